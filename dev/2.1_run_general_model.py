@@ -7,7 +7,8 @@ from time import time
 from gsa_geothermal.utils import lookup_geothermal, get_EF_methods
 from gsa_geothermal.general_models import GeothermalConventionalModel, GeothermalEnhancedModel
 from gsa_geothermal.parameters import get_parameters
-from gsa_geothermal.global_sensitivity_analysis import run_monte_carlo
+from gsa_geothermal.global_sensitivity_analysis import run_monte_carlo, given_data_analyze
+from gsa_geothermal.plotting.utils import save_dict_json
 
 if __name__ == '__main__':
     # Set project
@@ -55,11 +56,21 @@ if __name__ == '__main__':
             demand = {electricity_enh_prod: 1}
         model = ModelClass(parameters, exploration, success_rate)
 
-        parameters = model.run_with_presamples(parameters)
+        amounts = model.run_batch(parameters)
         t0 = time()
-        general_scores = run_monte_carlo(parameters, demand, methods, iterations)
+        general_scores = run_monte_carlo(
+            amounts, demand, methods, iterations, low_rank_update=True, array_io=model.array_io
+        )
         print("Monte Carlo took {:6.2f} seconds".format(time()-t0))
 
+        # Sensitivity indices from the same Monte Carlo runs, without a Saltelli design
+        sa_dict = given_data_analyze(dict(parameters), general_scores)
+        sa_dict = {
+            m: dict(S1=sa_dict["S1"][i], PAWN=sa_dict["PAWN"][i], parameters=sa_dict["parameters"])
+            for i, m in enumerate(sa_dict["methods"])
+        }
+        save_dict_json(sa_dict, filepath.with_name(filepath.stem + ".given_data_indices.json"))
+
         df_general_scores = pd.DataFrame.from_dict(general_scores, orient="columns")
 
         if select_climate_change_only:
@@ -2,7 +2,7 @@ import bw2data as bd
 from pathlib import Path
 
 # Local files
-from setups import task_per_worker
+from setups import task_per_worker, task_adaptive
 
 if __name__ == '__main__':
     project = 'Geothermal'
@@ -18,7 +18,12 @@ if __name__ == '__main__':
     write_dir_option.mkdir(parents=True, exist_ok=True)
 
     # Test
-    n_workers = 25
-    i_worker = 20
-    Y = task_per_worker(project, iterations, option, n_workers, i_worker, write_dir_option)
+    adaptive = False  # set to true to stop sampling as soon as Sobol indices converge
+    if adaptive:
+        sa_dict = task_adaptive(project, iterations, option, write_dir_option, time_budget=3600, verbose=True)
+        Y = sa_dict["Y"]
+    else:
+        n_workers = 25
+        i_worker = 20
+        Y = task_per_worker(project, iterations, option, n_workers, i_worker, write_dir_option)
     print(Y.shape)
@@ -12,6 +12,7 @@ if __name__ == "__main__":
 
     option = "conventional.diff_distributions"
     iterations = 500
+    num_resamples = 100  # bootstrap resamples for confidence intervals
 
     # Load data and setup everything
     path_base = Path("write_files") / "{}.N{}".format(option, iterations)
@@ -20,10 +21,13 @@ if __name__ == "__main__":
     problem, calc_second_order, parameters_list, methods = setup_geothermal_gsa(option)
 
     sa_dict = dict(parameters=parameters_list)
+    # Indices of all methods at once
+    sa_all = my_sobol_analyze(
+        problem, scores[:, :len(methods)], calc_second_order, num_resamples=num_resamples
+    )
     for i, method in enumerate(methods):
         method_name = method[-2]
-        Y = scores[:, i]
-        sa_dict[method_name] = my_sobol_analyze(problem, Y, calc_second_order)
+        sa_dict[method_name] = {k: v[i] for k, v in sa_all.items()}
 
     parameters = sa_dict["parameters"]
     n_parameters = len(parameters)
@@ -7,7 +7,7 @@ import plotly.graph_objects as go
 from gsa_geothermal.plotting.utils import *
 from setups import setup_geothermal_gsa
 from gsa_geothermal.utils import get_lcia_results
-from gsa_geothermal.global_sensitivity_analysis import my_sobol_analyze
+from gsa_geothermal.global_sensitivity_analysis import sobol_convergence
 
 
 if __name__ == "__main__":
@@ -40,24 +40,12 @@ if __name__ == "__main__":
 
     Ns = np.arange(iterations_start, iterations_end, iterations_step)
 
-    first_arr = np.zeros((Ns.shape[0], len(methods), n_parameters))
-    total_arr = np.zeros((Ns.shape[0], len(methods), n_parameters))
-
-    for i, n in enumerate(Ns):
-
-        first_methods = {}
-        total_methods = {}
-        num_runs = n * (n_parameters + 2)
-        scores_n = scores[:num_runs]
-
-        for j, m in enumerate(methods_names):
-            sa_dict = my_sobol_analyze(
-                problem, scores_n[:, j], calc_second_order=calc_second_order
-            )
-            first = sa_dict["S1"]
-            total = sa_dict["ST"]
-            first_arr[i, j] = abs(first)
-            total_arr[i, j] = total
+    # All methods and all N with one pass over scores
+    sa_dict = sobol_convergence(
+        problem, scores[:, :len(methods)], Ns, calc_second_order=calc_second_order
+    )
+    first_arr = abs(sa_dict["S1"])
+    total_arr = sa_dict["ST"]
 
     df_first = pd.DataFrame(index=methods_names, columns=parameters)
     df_total = pd.DataFrame(index=methods_names, columns=parameters)
@@ -13,6 +13,8 @@ path_scores_enh = Path("write_files") / "enhanced.N{}".format(iterations_gsa) /
 
 # save data
 write_dir = Path("write_files")
+# Coefficients derived symbolically are cached here
+cache_dir = write_dir / "simplified_models_cache"
 
 # %% get coefficients
 thresholds = [0.2, 0.15, 0.1, 0.05]
@@ -26,11 +28,13 @@ for t in thresholds:
         path=path_scores_conv,
         threshold=t,
         ch4=True,
+        cache_dir=cache_dir,
     )
     ege_model_s = EnhancedSimplifiedModel(
         setup_geothermal_gsa=setup_geothermal_gsa,
         path=path_scores_enh,
-        threshold=t
+        threshold=t,
+        cache_dir=cache_dir,
     )
     coeff_conv[t] = cge_model_s.get_coeff()
     coeff_enh[t] = ege_model_s.get_coeff()
@@ -60,7 +64,8 @@ for t in thresholds:
         setup_geothermal_gsa=setup_geothermal_gsa,
         path=path_scores_enh,
         exploration=exploration,
-        threshold=t
+        threshold=t,
+        cache_dir=cache_dir,
     )
     coeff_enh_expl_false[t] = ege_model_s_expl_false.get_coeff() 
     
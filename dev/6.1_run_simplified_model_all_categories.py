@@ -30,6 +30,7 @@ if __name__ == '__main__':
     
     # save data
     write_dir_validation = Path("write_files") / "validation"
+    cache_dir = Path("write_files") / "simplified_models_cache"
     
     # load data
     iterations_gsa = 500
@@ -54,9 +55,11 @@ if __name__ == '__main__':
             print("{} already exists".format(filename))
         else:
             if "conventional" in option:
-                model = ConventionalSimplifiedModel(setup_geothermal_gsa, path_scores, threshold, ch4=False)
+                model = ConventionalSimplifiedModel(
+                    setup_geothermal_gsa, path_scores, threshold, ch4=False, cache_dir=cache_dir
+                )
             elif "enhanced" in option:
-                model = EnhancedSimplifiedModel(setup_geothermal_gsa, path_scores, threshold)
+                model = EnhancedSimplifiedModel(setup_geothermal_gsa, path_scores, threshold, cache_dir=cache_dir)
             # Compute
             simplified_scores = model.run(parameters)
             # Save
@@ -1,13 +1,17 @@
 import bw2data as bd
 import bw2calc as bc
+import hashlib
 import numpy as np
+import os
 import pickle
-from SALib.sample import saltelli
 
 from gsa_geothermal.utils import lookup_geothermal, get_EF_methods
 from gsa_geothermal.parameters import get_parameters
 from gsa_geothermal.general_models import GeothermalConventionalModel, GeothermalEnhancedModel
-from gsa_geothermal.global_sensitivity_analysis import GSAinLCA, model_per_X_chunk, gen_characterization_matrices
+from gsa_geothermal.global_sensitivity_analysis import (
+    GSAinLCA, model_per_X_chunk, gen_characterization_matrices, SaltelliRows, SobolAccumulator,
+    adaptive_sobol_analyze, morris_screening, reduce_uncertain_exchanges,
+)
 
 
 def setup_geothermal(project, option):
@@ -32,8 +36,7 @@ def setup_geothermal(project, option):
     return demand, geothermal_model, parameters
 
 
-def setup_gsa_problem(n_dimensions):
-    calc_second_order = False
+def setup_gsa_problem(n_dimensions, calc_second_order=False):
     problem = {
         'num_vars': n_dimensions,
         'names':    np.arange(n_dimensions),
@@ -42,7 +45,7 @@ def setup_gsa_problem(n_dimensions):
     return problem, calc_second_order
 
 
-def setup_geothermal_gsa(option):
+def setup_geothermal_gsa(option, calc_second_order=False):
     project = 'Geothermal'
     demand_act, gt_model, parameters = setup_geothermal(project, option)
     methods = get_EF_methods()
@@ -51,24 +54,70 @@ def setup_geothermal_gsa(option):
     lca.lcia()
     lca.build_demand_array()
     gsa_in_lca = GSAinLCA(project, lca, parameters, gt_model)
-    num_vars = (
-            len(gsa_in_lca.parameters_array) +
-            len(gsa_in_lca.uncertain_exchanges_dict['tech_params_where']) +
-            len(gsa_in_lca.uncertain_exchanges_dict['bio_params_where'])
-    )
-    problem, calc_second_order = setup_gsa_problem(num_vars)
+    problem, calc_second_order = setup_gsa_problem(gsa_in_lca.num_vars(), calc_second_order)
     parameters_list = gsa_in_lca.parameters_array['name'].tolist()
     return problem, calc_second_order, parameters_list, methods
 
 
-def task_per_worker(
+def get_screening_filepath(path_files, option, options, adjoint_threshold, groups, screening):
+    """Path of the exchanges kept by screening, whose name depends on all settings that the screening depends on."""
+    items = [option, options, adjoint_threshold, groups, sorted(screening.items())]
+    key = hashlib.sha256(repr(items).encode()).hexdigest()[:16]
+    return path_files.parent / "screening_keep_{}.npy".format(key)
+
+
+def screen_uncertain_exchanges(gsa_in_lca, characterization_matrix, screening, filepath):
+    """
+    Reduce uncertain exchanges of gsa_in_lca with Morris screening, see morris_screening and
+    reduce_uncertain_exchanges. Kept exchanges are loaded from filepath if it exists, and saved there otherwise.
+
+    Returns
+    -------
+    keep : np.array
+        Positions of kept exchanges among uncertain exchanges before screening.
+
+    """
+    if filepath.exists():
+        keep = np.load(filepath)
+        gsa_in_lca.select_uncertain_exchanges(keep)
+        return keep
+    screening = dict(screening)
+    threshold, n_keep = screening.pop("threshold"), screening.pop("n_keep")
+    screening_dict = morris_screening(gsa_in_lca, characterization_matrix, **screening)
+    keep = reduce_uncertain_exchanges(gsa_in_lca, screening_dict, threshold, n_keep, verbose=True)
+    # Write to a temporary file first, so that no one loads partially written exchanges
+    temp_filepath = filepath.with_name("{}.{}.tmp".format(filepath.name, os.getpid()))
+    with open(temp_filepath, "wb") as f:
+        np.save(f, keep)
+    os.replace(temp_filepath, filepath)
+    return keep
+
+
+def setup_task(
         project,
-        iterations,
         option,
-        n_workers,
-        i_chunk,
         path_files,
+        calc_second_order=False,
+        options=None,
+        screening=None,
+        adjoint_threshold=None,
+        groups=None,
+        low_rank_update=False,
+        keep=None,
 ):
+    """
+    Setup GSAinLCA, stacked characterization matrix and GSA problem for one worker.
+    If adjoint_threshold is given, uncertain exchanges selected with options whose adjoint importance is below it are
+    dropped first, see GSAinLCA.drop_negligible_exchanges.
+    If screening is a dict, eg dict(num_trajectories=10, threshold=0.01, seed=0), uncertain exchanges selected with
+    options are first reduced to the influential ones with Morris screening. The seed is 0 if not given, so that
+    screening is reproducible. Kept exchanges are saved in path_files with a name that depends on all settings, and
+    loaded in later setups with the same settings. With many workers, run task_screening once on the client and pass
+    its output as keep instead, then uncertain exchanges at positions keep are selected without screening.
+    If groups is given, eg "activity", all uncertain exchanges of a group are sampled together, see GSAinLCA.
+    If low_rank_update is True, samples that change only foreground exchanges are computed with a low rank update
+    of the base system instead of a full solve, see GSAinLCA.
+    """
 
     # 1. setup geothermal project
     demand_act, gt_model, parameters = setup_geothermal(project, option)
@@ -79,7 +128,7 @@ def task_per_worker(
     lca.lci(factorize=True)
     lca.lcia()
     lca.build_demand_array()
-    method_matrices = gen_characterization_matrices(lca, methods)
+    _, characterization_matrix = gen_characterization_matrices(lca, methods, return_stacked=True)
 
     # 3. gsa in lca model
     gsa_in_lca = GSAinLCA(
@@ -87,35 +136,139 @@ def task_per_worker(
         lca=lca,
         parameters=parameters,
         parameters_model=gt_model,
+        options=options,
+        perm_filepath=path_files.parent / "pardiso_perm.npy",
+        low_rank_update=low_rank_update,
+        groups=groups,
     )
 
+    # 3.1 drop negligible uncertain exchanges based on derivatives of scores
+    if adjoint_threshold is not None:
+        gsa_in_lca.drop_negligible_exchanges(characterization_matrix, adjoint_threshold, verbose=True)
+
+    # 3.2 screening of uncertain exchanges, or exchanges kept by a screening on the client
+    if keep is not None:
+        gsa_in_lca.select_uncertain_exchanges(keep)
+    elif screening is not None:
+        screening = {"threshold": 0.01, "n_keep": None, "seed": 0, **screening}
+        filepath_keep = get_screening_filepath(path_files, option, options, adjoint_threshold, groups, screening)
+        screen_uncertain_exchanges(gsa_in_lca, characterization_matrix, screening, filepath_keep)
+
     # 4. setup GSA project in the SALib format
-    num_vars = (
-            len(gsa_in_lca.parameters_array) +
-            len(gsa_in_lca.uncertain_exchanges_dict['tech_params_where']) +
-            len(gsa_in_lca.uncertain_exchanges_dict['bio_params_where'])
-    )
-    problem, calc_second_order = setup_gsa_problem(num_vars)
+    problem, calc_second_order = setup_gsa_problem(gsa_in_lca.num_vars(), calc_second_order)
 
-    # 5. generate sobol samples, choose correct chunk for the current worker based on index i_chunk
-    X = saltelli.sample(problem, iterations, calc_second_order=calc_second_order)
+    return gsa_in_lca, characterization_matrix, problem, calc_second_order
 
-    # 6. Extract part of the sample for the current worker
-    chunk_size = X.shape[0]//n_workers
-    start = i_chunk*chunk_size
-    if i_chunk != n_workers-1:
-        end = (i_chunk+1)*chunk_size
-    else:
-        end = X.shape[0]
-    X_chunk = X[start:end, :]
-    del X
+
+def task_per_worker(
+        project,
+        iterations,
+        option,
+        n_workers,
+        i_chunk,
+        path_files,
+        return_sums=False,
+        calc_second_order=False,
+        options=None,
+        screening=None,
+        adjoint_threshold=None,
+        groups=None,
+        low_rank_update=False,
+        keep=None,
+):
+    """
+    Compute scores for chunk i_chunk of the Saltelli design and save them in path_files.
+    If return_sums is True, chunks contain complete Saltelli blocks and only a SobolAccumulator with partial sums
+    is returned, so that raw scores are not sent back to the client.
+    If calc_second_order is True, the design also contains BA blocks for second order indices.
+    Options, screening and adjoint_threshold select uncertain exchanges and groups group them, see setup_task.
+    If low_rank_update is True, foreground samples are computed with a low rank update, see setup_task.
+    Keep are exchanges kept by task_screening on the client, see setup_task.
+    """
+
+    # 1.-4. setup geothermal project, characterization matrices, gsa in lca model and GSA problem
+    gsa_in_lca, characterization_matrix, problem, calc_second_order = setup_task(
+        project,
+        option,
+        path_files,
+        calc_second_order,
+        options,
+        screening,
+        adjoint_threshold,
+        groups,
+        low_rank_update,
+        keep,
+    )
+
+    # 5. generate only the rows of sobol samples for the current worker based on index i_chunk
+    saltelli_rows = SaltelliRows(problem, iterations, calc_second_order=calc_second_order)
+    start, end, X_chunk = saltelli_rows.chunk(n_workers, i_chunk, align_blocks=return_sums)
 
     # 6. compute scores for all methods for X_chunk
-    scores_for_methods = model_per_X_chunk(X_chunk, gsa_in_lca, method_matrices)
+    scores_for_methods = model_per_X_chunk(X_chunk, gsa_in_lca, characterization_matrix)
 
     # 7. Save results
     filepath = path_files / 'scores_{}_{}.pkl'.format(start, end-1)
     with open(filepath, "wb") as fp:
         pickle.dump(scores_for_methods, fp)
 
+    if return_sums:
+        accumulator = SobolAccumulator(
+            problem['num_vars'], scores_for_methods.shape[1], calc_second_order=calc_second_order
+        )
+        return accumulator.update(scores_for_methods)
+
     return scores_for_methods
+
+
+def task_screening(
+        project,
+        option,
+        path_files,
+        screening,
+        options=None,
+        adjoint_threshold=None,
+        groups=None,
+):
+    """
+    Run Morris screening once, eg on the client before submitting task_per_worker, see setup_task for arguments.
+    Returns positions of kept exchanges that should be passed as keep to all workers, so that they use the same ones.
+    """
+
+    gsa_in_lca, characterization_matrix, _, _ = setup_task(
+        project, option, path_files, options=options, adjoint_threshold=adjoint_threshold, groups=groups
+    )
+    screening = {"threshold": 0.01, "n_keep": None, "seed": 0, **screening}
+    filepath_keep = get_screening_filepath(path_files, option, options, adjoint_threshold, groups, screening)
+    return screen_uncertain_exchanges(gsa_in_lca, characterization_matrix, screening, filepath_keep)
+
+
+def task_adaptive(
+        project,
+        iterations_max,
+        option,
+        path_files,
+        time_budget=None,
+        **kwargs,
+):
+    """
+    Evaluate the Saltelli design in batches until Sobol indices converge, see adaptive_sobol_analyze for kwargs.
+    Scores of all evaluated blocks are saved in path_files.
+    """
+
+    gsa_in_lca, characterization_matrix, problem, calc_second_order = setup_task(project, option, path_files)
+
+    sa_dict = adaptive_sobol_analyze(
+        problem,
+        lambda X_chunk: model_per_X_chunk(X_chunk, gsa_in_lca, characterization_matrix),
+        iterations_max,
+        calc_second_order=calc_second_order,
+        time_budget=time_budget,
+        **kwargs,
+    )
+
+    filepath = path_files / 'scores_{}_{}.pkl'.format(0, sa_dict['Y'].shape[0]-1)
+    with open(filepath, "wb") as fp:
+        pickle.dump(sa_dict['Y'], fp)
+
+    return sa_dict
@@ -57,6 +57,22 @@ class GeothermalConventionalModel:
         # Input output array
         self.array_io = self.get_input_output_array()
 
+    def get_inputs(self):
+        """Keys of inputs of the electricity production activity, in the order of array_io."""
+        return [
+            self.wellhead,
+            self.diesel,
+            self.steel,
+            self.cement,
+            self.water,
+            self.drilling_mud,
+            self.drill_wst,
+            self.wells_closr,
+            self.coll_pipe,
+            self.plant,
+            self.co2,
+        ]
+
     def get_input_output_array(self):
         """
         TODO add some description
@@ -72,21 +88,7 @@ class GeothermalConventionalModel:
                 ("amount", "<f4"),
             ]
         )
-        inputs = np.array(
-            [
-                self.wellhead,
-                self.diesel,
-                self.steel,
-                self.cement,
-                self.water,
-                self.drilling_mud,
-                self.drill_wst,
-                self.wells_closr,
-                self.coll_pipe,
-                self.plant,
-                self.co2,
-            ]
-        )
+        inputs = np.array(self.get_inputs())
         output = self.electricity_prod
         amounts = np.zeros(len(inputs), dtype=float)
         array_io = np.empty(len(inputs), dtype=dtype_io)
@@ -202,8 +204,8 @@ class GeothermalConventionalModel:
             lifetime_electricity_generated,
         ]
 
-    def run(self, parameters):
-        """Run model and return for use with pygsa."""
+    def get_amounts(self, parameters):
+        """Amounts of all inputs per kwh generated in the order of array_io, either floats or arrays."""
 
         (
             number_of_wells,
@@ -217,31 +219,7 @@ class GeothermalConventionalModel:
             total_collection_pipelines,
             lifetime_electricity_generated,
         ) = self.model(parameters)
-        # Amounts per kwh generated
-        amounts = (
-            np.array(
-                [
-                    number_of_wells,
-                    diesel_consumption,
-                    steel_consumption,
-                    cement_consumption,
-                    water_cem_consumption,
-                    drilling_mud_consumption,
-                    drilling_waste,
-                    total_metres_drilled,
-                    total_collection_pipelines,
-                    parameters["installed_capacity"],
-                ]
-            )
-            / lifetime_electricity_generated
-        )
-        amounts = np.hstack([amounts, parameters["co2_emissions"]])
-        return amounts
-
-    def run_with_presamples(self, parameters):
-        """Run model and return for use with presamples."""
-
-        (
+        amounts = [
             number_of_wells,
             diesel_consumption,
             steel_consumption,
@@ -251,62 +229,43 @@ class GeothermalConventionalModel:
             drilling_waste,
             total_metres_drilled,
             total_collection_pipelines,
-            lifetime_electricity_generated,
-        ) = self.model(parameters)
+            parameters["installed_capacity"],
+        ]
+        amounts = [amount / lifetime_electricity_generated for amount in amounts]
+        amounts.append(parameters["co2_emissions"])
+        return amounts
+
+    def run(self, parameters):
+        """Run model and return for use with pygsa."""
+        # Works both for float and array parameters, in the latter case amounts have shape (n_exchanges, n_samples)
+        return np.array(np.broadcast_arrays(*self.get_amounts(parameters)))
+
+    def run_batch(self, parameters):
+        """
+        Run model for any number of samples at once.
+
+        Attributes
+        ----------
+        parameters : dict, NamedParameters or np.array
+            Values of parameters, either floats or arrays of the same length, eg NamedParameters after `.stochastic`,
+            or a structured array with one field per parameter.
+
+        Returns
+        -------
+        amounts : np.array
+            C-contiguous float64 matrix with shape (n_exchanges, n_samples), rows are aligned with self.array_io.
+
+        """
+        amounts = np.broadcast_arrays(
+            *[np.asarray(amount, dtype=np.float64) for amount in self.get_amounts(parameters)]
+        )
+        return np.ascontiguousarray(np.stack(amounts).reshape(len(amounts), -1))
+
+    def run_with_presamples(self, parameters):
+        """Run model and return for use with presamples."""
 
-        # TODO Need to find a way to include array in column "amount" in the structured array "array_io"
+        amounts = self.run_batch(parameters)
         return [
-            (
-                self.wellhead,
-                self.electricity_prod,
-                np.array(number_of_wells / lifetime_electricity_generated),
-            ),
-            (
-                self.diesel,
-                self.electricity_prod,
-                np.array(diesel_consumption / lifetime_electricity_generated),
-            ),
-            (
-                self.steel,
-                self.electricity_prod,
-                np.array(steel_consumption / lifetime_electricity_generated),
-            ),
-            (
-                self.cement,
-                self.electricity_prod,
-                np.array(cement_consumption / lifetime_electricity_generated),
-            ),
-            (
-                self.water,
-                self.electricity_prod,
-                np.array(water_cem_consumption / lifetime_electricity_generated),
-            ),
-            (
-                self.drilling_mud,
-                self.electricity_prod,
-                np.array(drilling_mud_consumption / lifetime_electricity_generated),
-            ),
-            (
-                self.drill_wst,
-                self.electricity_prod,
-                np.array(drilling_waste / lifetime_electricity_generated),
-            ),
-            (
-                self.wells_closr,
-                self.electricity_prod,
-                np.array(total_metres_drilled / lifetime_electricity_generated),
-            ),  # well closure
-            (
-                self.coll_pipe,
-                self.electricity_prod,
-                np.array(total_collection_pipelines / lifetime_electricity_generated),
-            ),
-            (
-                self.plant,
-                self.electricity_prod,
-                np.array(
-                    parameters["installed_capacity"] / lifetime_electricity_generated
-                ),
-            ),
-            (self.co2, self.electricity_prod, np.array(parameters["co2_emissions"])),
+            (input_, self.electricity_prod, amounts[i])
+            for i, input_ in enumerate(self.get_inputs())
         ]
@@ -1,2 +1,15 @@
 from .gsa_lca_dask import GSAinLCA
-from .utils import my_sobol_analyze, model_per_X_chunk, gen_characterization_matrices, run_monte_carlo
+from .sampling import SaltelliRows
+from .adaptive import adaptive_sobol_analyze
+from .given_data import given_data_analyze
+from .screening import morris_screening, reduce_uncertain_exchanges
+from .utils import (
+    my_sobol_analyze,
+    sobol_confidence_intervals,
+    SobolAccumulator,
+    sobol_convergence,
+    model_per_X_chunk,
+    gen_characterization_matrices,
+    stack_characterization_matrices,
+    run_monte_carlo,
+)
@@ -0,0 +1,122 @@
+import time
+import numpy as np
+
+# Local files
+from .sampling import SaltelliRows
+from .utils import SobolAccumulator, sobol_confidence_intervals
+
+
+def top_ranking(total, n_top):
+    """Indices of the n_top parameters with the highest total indices, shape (n_methods, n_top)."""
+    return np.argsort(-total, axis=1, kind="stable")[:, :n_top]
+
+
+def adaptive_sobol_analyze(
+    problem,
+    model,
+    N_max,
+    calc_second_order=False,
+    n_blocks_batch=32,
+    n_top=5,
+    patience=2,
+    conf_tolerance=0.05,
+    time_budget=None,
+    num_resamples=100,
+    seed=None,
+    verbose=False,
+):
+    """
+    Evaluate the Saltelli design in successive batches of blocks, until first and total order indices of all
+    methods have converged, or until a wall-clock budget runs out.
+
+    Indices are considered converged when, for every method, the ranking of the n_top parameters with the highest
+    total indices has not changed for the last `patience` batches, and confidence intervals of their total indices
+    are not wider than conf_tolerance. Blocks are taken in order from the design with N_max base samples, so that
+    a converged run is a prefix of the full run.
+
+    Attributes
+    ----------
+    problem : dict
+        Problem definition in the SALib format.
+    model : callable
+        Computes scores with shape (n_rows, n_methods) for samples X_chunk, eg
+        lambda X_chunk: model_per_X_chunk(X_chunk, gsa_in_lca, characterization_matrix).
+    N_max : int
+        Maximum number of base samples, at least 1.
+    time_budget : float
+        Optional wall-clock budget in seconds.
+    verbose : bool
+        Whether to print progress after each batch.
+
+    Returns
+    -------
+    dict_ : dict
+        Contains S1, ST, S1_conf and ST_conf with shape (n_methods, D), scores Y of all evaluated blocks, number of
+        base samples N, whether indices converged and the reason to stop.
+
+    """
+
+    if N_max < 1:
+        raise ValueError("N_max should be at least 1 to evaluate one block of the Saltelli design")
+
+    t_start = time.time()
+    saltelli_rows = SaltelliRows(problem, N_max, calc_second_order=calc_second_order)
+    step = saltelli_rows.block_size
+
+    accumulator = None
+    scores = []
+    rankings = []
+    n_stable = 0
+    n, n_conf = 0, None
+    converged, reason = False, "N_max reached"
+
+    while n < N_max:
+        n_next = min(n + n_blocks_batch, N_max)
+        Y_batch = np.asarray(model(saltelli_rows.rows(n * step, n_next * step)))
+        Y_batch = Y_batch.reshape(Y_batch.shape[0], -1)
+        scores.append(Y_batch)
+        n = n_next
+
+        if accumulator is None:
+            accumulator = SobolAccumulator(
+                problem["num_vars"], Y_batch.shape[1], calc_second_order=calc_second_order
+            )
+        accumulator.update(Y_batch)
+        dict_ = accumulator.indices()
+
+        ranking = top_ranking(dict_["ST"], n_top)
+        if len(rankings) != 0 and np.array_equal(ranking, rankings[-1]):
+            n_stable += 1
+        else:
+            n_stable = 0
+        rankings.append(ranking)
+
+        if n_stable >= patience:
+            dict_.update(
+                sobol_confidence_intervals(
+                    problem, np.vstack(scores), calc_second_order, num_resamples, seed=seed
+                )
+            )
+            n_conf = n
+            conf = np.take_along_axis(dict_["ST_conf"], ranking, axis=1)
+            if np.all(conf <= conf_tolerance):
+                converged, reason = True, "converged"
+                break
+
+        if time_budget is not None and time.time() - t_start >= time_budget:
+            reason = "time budget reached"
+            break
+
+        if verbose:
+            print("N = {}, ranking stable for {} batches".format(n, n_stable))
+
+    Y = np.vstack(scores)
+    if n_conf != n:
+        dict_.update(
+            sobol_confidence_intervals(problem, Y, calc_second_order, num_resamples, seed=seed)
+        )
+    dict_.update(dict(Y=Y, N=n, converged=converged, reason=reason))
+    if verbose:
+        print("Stopped at N = {}: {}".format(n, reason))
+
+    return dict_
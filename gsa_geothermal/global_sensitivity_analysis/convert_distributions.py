@@ -17,64 +17,91 @@ def check_inputs(parameters, sample, distribution):
     assert parameters.shape[0] == sample.shape[0]
 
 
-def convert_sample_to_normal_or_lognormal(parameters, sample, distribution):
-    """Convert uniform in [0,1] to NORMAL or LOGNORMAL distribution."""
+def as_column(values, sample):
+    """Reshape per-parameter values so that they broadcast against a sample of shape (n_params,) or (n_params, n)."""
+    values = np.asarray(values).reshape(-1)
+    if sample.ndim == 2:
+        values = values.reshape(-1, 1)
+    return values
 
-    min_val = distribution.cdf(parameters, parameters["minimum"]).squeeze()
-    mask_is_nan_min = np.asarray(np.isnan(min_val).squeeze()).nonzero()[0]
-    np.put(min_val, mask_is_nan_min, Q_LOW)
 
-    max_val = distribution.cdf(parameters, parameters["maximum"]).squeeze()
-    mask_is_nan_max = np.asarray(np.isnan(max_val).squeeze()).nonzero()[0]
-    np.put(max_val, mask_is_nan_max, Q_HIGH)
+def normal_or_lognormal_bounds(parameters, distribution):
+    """
+    Quantities that are constant per parameter for the conversion to NORMAL or LOGNORMAL distribution:
+    quantiles of minimum and maximum (Q_LOW and Q_HIGH if they are not defined), and values at Q_LOW and Q_HIGH
+    that replace +-inf.
+    """
 
-    q = (max_val - min_val) * sample + min_val
-    params_converted = distribution.ppf(parameters, q).squeeze()
+    min_val = distribution.cdf(parameters, parameters["minimum"]).reshape(-1)
+    min_val[np.isnan(min_val)] = Q_LOW
 
-    # which values of params_converted are equal to +-inf? -> replace with Q_HIGH and Q_LOW
-    mask_is_neg_inf = np.where(params_converted == -np.inf)[0]
-    mask_is_pos_inf = np.where(params_converted == np.inf)[0]
+    max_val = distribution.cdf(parameters, parameters["maximum"]).reshape(-1)
+    max_val[np.isnan(max_val)] = Q_HIGH
+
+    n_params = parameters.shape[0]
+    q_low_ppf = distribution.ppf(parameters, np.full(n_params, Q_LOW)).reshape(-1)
+    q_high_ppf = distribution.ppf(parameters, np.full(n_params, Q_HIGH)).reshape(-1)
+
+    return min_val, max_val, q_low_ppf, q_high_ppf
+
+
+def convert_sample_to_normal_or_lognormal(parameters, sample, distribution, bounds=None):
+    """
+    Convert uniform in [0,1] to NORMAL or LOGNORMAL distribution.
+    Sample can be of shape (n_params,) or (n_params, n), where each column is converted with the same parameters.
+    Bounds from normal_or_lognormal_bounds can be passed to avoid recomputing them.
+    """
+
+    if bounds is None:
+        bounds = normal_or_lognormal_bounds(parameters, distribution)
+    min_val, max_val, q_low_ppf, q_high_ppf = bounds
 
-    q_low_ppf = distribution.ppf(
-        parameters[mask_is_neg_inf], np.array([Q_LOW] * mask_is_neg_inf.shape[0])
+    q = as_column(max_val - min_val, sample) * sample + as_column(min_val, sample)
+    params_converted = distribution.ppf(parameters, q).reshape(sample.shape)
+
+    # which values of params_converted are equal to +-inf? -> replace with Q_HIGH and Q_LOW
+    params_converted = np.where(
+        params_converted == -np.inf, as_column(q_low_ppf, sample), params_converted
     )
-    q_high_ppf = distribution.ppf(
-        parameters[mask_is_pos_inf], np.array([Q_HIGH] * mask_is_pos_inf.shape[0])
+    params_converted = np.where(
+        params_converted == np.inf, as_column(q_high_ppf, sample), params_converted
     )
 
-    np.put(params_converted, mask_is_neg_inf, q_low_ppf)
-    np.put(params_converted, mask_is_pos_inf, q_high_ppf)
-
     return params_converted
 
 
-def convert_sample_to_truncated_triang(parameters, sample):
+def truncated_triang_bounds(parameters):
+    """Quantiles of minimum and maximum for the conversion to TRUNCATED TRIANGULAR distribution."""
+    kwargs = dict(c=parameters["shape"], loc=parameters["loc"], scale=parameters["scale"])
+    q_low_t = stats.triang.cdf(parameters["minimum"], **kwargs)
+    q_high_t = stats.triang.cdf(parameters["maximum"], **kwargs)
+    return q_low_t, q_high_t
+
+
+def convert_sample_to_truncated_triang(parameters, sample, bounds=None):
     """
     Convert uniform in [0,1] to TRUNCATED TRIANGULAR distribution
+    Bounds from truncated_triang_bounds can be passed to avoid recomputing them.
     TODO check correctness and update in stats_arrays
     """
 
-    q_low_t = stats.triang.cdf(
-        parameters["minimum"],
-        c=parameters["shape"],
-        loc=parameters["loc"],
-        scale=parameters["scale"],
-    )
-    q_high_t = stats.triang.cdf(
-        parameters["maximum"],
-        c=parameters["shape"],
-        loc=parameters["loc"],
-        scale=parameters["scale"],
-    )
+    if bounds is None:
+        bounds = truncated_triang_bounds(parameters)
+    q_low_t, q_high_t = (as_column(b, sample) for b in bounds)
+
+    c = as_column(parameters["shape"], sample)
+    loc = as_column(parameters["loc"], sample)
+    scale = as_column(parameters["scale"], sample)
     q_t = (q_high_t - q_low_t) * sample + q_low_t
-    params_converted = stats.triang.ppf(
-        q_t, c=parameters["shape"], loc=parameters["loc"], scale=parameters["scale"]
-    )
+    params_converted = stats.triang.ppf(q_t, c=c, loc=loc, scale=scale)
     return params_converted
 
 
 def convert_sample(parameters, sample):
-    """Convert all samples to correct distributions."""
+    """
+    Convert all samples to correct distributions.
+    Sample can be of shape (n_params,) or (n_params, n), the output has the same shape as the sample.
+    """
 
     # Identify distribution
     distr = DISTRIBUTIONS_DICT[parameters["uncertainty_type"][0]]
@@ -83,13 +110,93 @@ def convert_sample(parameters, sample):
     if distr == sa.NormalUncertainty or distr == sa.LognormalUncertainty:
         return convert_sample_to_normal_or_lognormal(parameters, sample, distr)
     elif distr == sa.TriangularUncertainty:
-        converted = np.empty(len(sample))
+        converted = np.empty(sample.shape)
         loc_nan = np.where(np.isnan(parameters["scale"]))[0]
         loc_not_nan = np.setdiff1d(np.arange(len(sample)), loc_nan)
-        converted[loc_nan] = distr.ppf(parameters[loc_nan], sample[loc_nan]).flatten()
+        converted[loc_nan] = distr.ppf(parameters[loc_nan], sample[loc_nan]).reshape(
+            sample[loc_nan].shape
+        )
         converted[loc_not_nan] = convert_sample_to_truncated_triang(
             parameters[loc_not_nan], sample[loc_not_nan]
-        ).flatten()
+        ).reshape(sample[loc_not_nan].shape)
         return converted
     else:
-        return distr.ppf(parameters, sample)
+        return distr.ppf(parameters, sample).reshape(sample.shape)
+
+
+class SampleConverter:
+    """
+    Convert uniform samples on [0,1] to the distributions of a params array, eg uncertain exchanges in
+    lca.tech_params or parameters of a ParametersModel.
+
+    Groups of params with the same distribution and all quantities that are constant per param, such as quantiles
+    of truncation bounds, are computed once in the constructor, so that each conversion is a few array operations
+    per distribution.
+
+    Attributes
+    ----------
+    params : np.array
+        params dtype should contain 'uncertainty_type' and uncertainty/distribution information consistent with
+        stats_arrays.
+
+    """
+
+    def __init__(self, params):
+        self.params = params
+        self.n_params = params.shape[0]
+        # List of (distribution, positions in params, params at positions, precomputed bounds or None)
+        self.groups = []
+
+        for uncertainty_type in np.unique(params["uncertainty_type"]):
+            distr = DISTRIBUTIONS_DICT[uncertainty_type]
+            where = np.where(params["uncertainty_type"] == uncertainty_type)[0]
+            if distr == sa.NormalUncertainty or distr == sa.LognormalUncertainty:
+                self.add_group(
+                    distr, where, normal_or_lognormal_bounds(params[where], distr)
+                )
+            elif distr == sa.TriangularUncertainty:
+                truncated = ~np.isnan(params["scale"][where])
+                self.add_group(distr, where[~truncated])
+                self.add_group(
+                    distr,
+                    where[truncated],
+                    truncated_triang_bounds(params[where[truncated]]),
+                )
+            else:
+                self.add_group(distr, where)
+
+    def add_group(self, distribution, where, bounds=None):
+        if where.shape[0] != 0:
+            self.groups.append((distribution, where, self.params[where], bounds))
+
+    def convert(self, matrix):
+        """
+        Convert matrix of shape (n_rows, n_params), or a single sample of shape (n_params,), to the distributions
+        of params. The output has the same shape as matrix.
+        """
+
+        matrix = np.asarray(matrix)
+        assert matrix.shape[-1] == self.n_params
+
+        converted = np.empty(matrix.shape)
+        if self.n_params == 0:
+            return converted
+
+        # Params are along the first axis of the transposed matrix, always 2d for stats_arrays
+        sample_t = matrix.reshape(-1, self.n_params).T
+        converted_t = converted.reshape(-1, self.n_params).T
+
+        for distr, where, params, bounds in self.groups:
+            sample = sample_t[where]
+            if distr == sa.NormalUncertainty or distr == sa.LognormalUncertainty:
+                converted_t[where] = convert_sample_to_normal_or_lognormal(
+                    params, sample, distr, bounds
+                )
+            elif bounds is not None:
+                converted_t[where] = convert_sample_to_truncated_triang(
+                    params, sample, bounds
+                )
+            else:
+                converted_t[where] = distr.ppf(params, sample).reshape(sample.shape)
+
+        return converted
@@ -0,0 +1,155 @@
+import numpy as np
+from collections.abc import Mapping
+from scipy import sparse
+
+
+def prepare_given_data(X, Y):
+    """
+    Convert inputs and outputs of any Monte Carlo run to arrays.
+
+    Attributes
+    ----------
+    X : np.array or Mapping
+        Inputs with shape (n_runs, D), or a mapping from parameter names to arrays with n_runs values, eg
+        NamedParameters after `.stochastic`.
+    Y : np.array or Mapping
+        Outputs with shape (n_runs,) or (n_runs, n_methods), or a mapping from method names to arrays with n_runs
+        values, eg the output of run_monte_carlo.
+
+    Returns
+    -------
+    X, Y : np.array
+        Arrays with shape (n_runs, D) and (n_runs, n_methods).
+    parameters, methods : list
+        Names of parameters and methods, None if X or Y are arrays.
+
+    """
+    parameters, methods = None, None
+    if isinstance(Y, Mapping):
+        methods = list(Y.keys())
+        Y = np.column_stack([np.ravel(Y[m]) for m in methods])
+    Y = np.asarray(Y, dtype=np.float64)
+    Y = Y.reshape(Y.shape[0], -1)
+    if isinstance(X, Mapping):
+        parameters = list(X.keys())
+        # Parameters with fixed values are repeated for all runs
+        X = np.column_stack(
+            [np.broadcast_to(np.ravel(X[p]), (Y.shape[0],)) for p in parameters]
+        )
+    X = np.asarray(X, dtype=np.float64)
+    assert X.shape[0] == Y.shape[0], "X and Y should have the same number of runs"
+    return X, Y, parameters, methods
+
+
+def quantile_bins(X, n_bins):
+    """Assign each run to one of n_bins bins of equal size along each input, shape (n_runs, D)."""
+    n_runs = X.shape[0]
+    ranks = np.argsort(np.argsort(X, axis=0, kind="stable"), axis=0, kind="stable")
+    return ranks * n_bins // n_runs
+
+
+def first_order_given_data(X, Y, n_bins=None):
+    """
+    First order indices Var(E[Y|X_i]) / Var(Y), with conditional means estimated in quantile bins of each input,
+    for all inputs and methods at once.
+
+    Attributes
+    ----------
+    X, Y : np.array
+        Inputs with shape (n_runs, D), outputs with shape (n_runs, n_methods).
+    n_bins : int
+        Number of bins, by default about sqrt(n_runs).
+
+    Returns
+    -------
+    first : np.array
+        Indices with shape (n_methods, D), zero for constant inputs.
+
+    """
+    n_runs, D = X.shape
+    if n_bins is None:
+        n_bins = max(int(np.sqrt(n_runs)), 2)
+
+    # Indicator matrix of (input, bin) pairs, so that sums of Y in all bins are one sparse product
+    bins = quantile_bins(X, n_bins) + np.arange(D) * n_bins
+    indicator = sparse.csr_matrix(
+        (np.ones(n_runs * D), (bins.T.reshape(-1), np.tile(np.arange(n_runs), D))),
+        shape=(D * n_bins, n_runs),
+    )
+    counts = np.asarray(indicator.sum(axis=1)).reshape(D, n_bins, 1)
+    Y_centered = Y - Y.mean(axis=0)
+    sums = (indicator @ Y_centered).reshape(D, n_bins, -1)
+
+    with np.errstate(invalid="ignore", divide="ignore"):
+        between = np.where(counts > 0, sums ** 2 / counts, 0).sum(axis=1)
+    # Bins of constant inputs are arbitrary
+    between[np.ptp(X, axis=0) == 0] = 0
+    return (between / (n_runs * Y.var(axis=0))).T
+
+
+def pawn_given_data(X, Y, n_bins=10, statistic="median"):
+    """
+    PAWN moment independent indices (Pianosi and Wagener 2015, 2018): Kolmogorov-Smirnov distance between the
+    unconditional distribution of Y and its distributions conditional on quantile bins of each input, summarized
+    over bins with `statistic`, for all methods at once.
+
+    Attributes
+    ----------
+    X, Y : np.array
+        Inputs with shape (n_runs, D), outputs with shape (n_runs, n_methods).
+    statistic : str
+        "median", "mean" or "max" of KS distances over bins.
+
+    Returns
+    -------
+    pawn : np.array
+        Indices with shape (n_methods, D), zero for constant inputs.
+
+    """
+    n_runs, D = X.shape
+    n_methods = Y.shape[1]
+    bins = quantile_bins(X, n_bins)
+    Y_ranks = np.argsort(np.argsort(Y, axis=0, kind="stable"), axis=0, kind="stable")
+    summarize = dict(median=np.median, mean=np.mean, max=np.max)[statistic]
+    constant = np.ptp(X, axis=0) == 0
+
+    pawn = np.zeros((n_methods, D))
+    for i in np.where(~constant)[0]:
+        counts = np.bincount(bins[:, i], minlength=n_bins)
+        starts = np.r_[0, np.cumsum(counts)[:-1]]
+        nonempty = counts > 0
+        # One sort by (bin, rank of Y) for all methods, bins are at the same positions for all methods
+        keys = np.sort(bins[:, i][:, np.newaxis] * n_runs + Y_ranks, axis=0)
+        b = keys[:, 0] // n_runs
+        s = keys % n_runs
+        k = counts[b][:, np.newaxis]
+        j = (np.arange(n_runs) - starts[b] + 1)[:, np.newaxis]
+        # Distance between empirical CDFs just after and just before each run of the bin
+        distance = np.maximum(np.abs(j / k - (s + 1) / n_runs), np.abs((j - 1) / k - s / n_runs))
+        ks = np.maximum.reduceat(distance, starts[nonempty], axis=0)
+        pawn[:, i] = summarize(ks, axis=0)
+    return pawn
+
+
+def given_data_analyze(X, Y, n_bins_first=None, n_bins_pawn=10, statistic="median"):
+    """
+    Sensitivity indices from any Monte Carlo sample, eg parameters and scores of run_monte_carlo, instead of
+    a Saltelli design.
+
+    Returns
+    -------
+    dict_ : dict
+        Contains first order indices S1 and PAWN indices with shape (n_methods, D), and names of parameters and
+        methods if X and Y are mappings.
+
+    """
+    X, Y, parameters, methods = prepare_given_data(X, Y)
+    dict_ = dict(
+        S1=first_order_given_data(X, Y, n_bins_first),
+        PAWN=pawn_given_data(X, Y, n_bins_pawn, statistic),
+    )
+    if parameters is not None:
+        dict_["parameters"] = parameters
+    if methods is not None:
+        dict_["methods"] = methods
+    return dict_
@@ -2,12 +2,14 @@ import numpy as np
 from scipy import sparse
 import bw2data as bd
 from bw2calc.utils import TYPE_DICTIONARY
-from pypardiso import spsolve
 from gsa_geothermal.utils import NamedParametersSeed as NamedParameters
-import stats_arrays as sa
 
 # Local files
-from ..global_sensitivity_analysis.convert_distributions import convert_sample
+from ..global_sensitivity_analysis.convert_distributions import SampleConverter
+from ..global_sensitivity_analysis.pardiso_solver import PatternSolver
+from ..global_sensitivity_analysis.low_rank import ForegroundUpdate
+from ..global_sensitivity_analysis.params_index import ParamsIndex
+from ..global_sensitivity_analysis.utils import stack_characterization_matrices
 
 # TODO we need not consider exchanges in db that are not being used
 # TODO remove repetitive exchanges
@@ -17,15 +19,28 @@ class GSAinLCA:
     """Perform Global Sensitivity Analysis (GSA) in Life Cycle Assessment (LCA)."""
 
     def __init__(
-        self, project, lca, parameters=None, parameters_model=None, options=None
+        self,
+        project,
+        lca,
+        parameters=None,
+        parameters_model=None,
+        options=None,
+        perm_filepath=None,
+        low_rank_update=False,
+        groups=None,
     ):
 
         self.project = project
         self.lca = lca
         self.options = options
+        self.low_rank_update = low_rank_update
 
         bd.projects.set_current(project)
 
+        # 0. Indices for lookups in tech_params and bio_params
+        self.tech_params_index = ParamsIndex(self.lca.tech_params)
+        self.bio_params_index = ParamsIndex(self.lca.bio_params)
+
         # 1. Generate parameters dictionary
         if parameters is not None and parameters_model is not None:
             if type(parameters) is not NamedParameters:
@@ -36,6 +51,7 @@ class GSAinLCA:
             self.parameters_model = parameters_model
             self.parameters.static()
             self.parameters_array = self.convert_named_parameters_to_array()
+            self.parameters_converter = SampleConverter(self.parameters_array)
             self.parameterized_exchanges_dict = self.obtain_parameterized_exchanges(
                 self.lca, self.parameters, self.parameters_model
             )
@@ -47,40 +63,246 @@ class GSAinLCA:
         self.uncertain_exchanges_dict = self.obtain_uncertain_exchanges(
             self, lca=self.lca, options=self.options
         )
+        # 2.1 Groups of uncertain exchanges that are driven by the same column of samples
+        self.uncertain_exchanges_dict.update(self.obtain_groups(self.lca, groups))
 
-    @staticmethod
-    def get_mask_unc_col_amt(params, i):
-        mask = np.all(
-            [
-                params["uncertainty_type"] != 0,
-                params["col"] == i,
-                params["amount"] != 0,
-            ],
-            axis=0,
+        # 3. Build sparsity patterns of technosphere and biosphere matrices, they are the same for all samples
+        self.tech_params_sign = self.fix_supply_use(
+            self.lca.tech_params, np.ones(self.lca.tech_params.shape[0])
         )
-        return mask
+        self.technosphere_matrix, self.tech_params_slots = self.build_matrix_pattern(
+            self.lca.tech_params,
+            self.lca._activity_dict,
+            self.lca._product_dict,
+            "row",
+            "col",
+        )
+        self.biosphere_matrix, self.bio_params_slots = self.build_matrix_pattern(
+            self.lca.bio_params,
+            self.lca._biosphere_dict,
+            self.lca._activity_dict,
+            "row",
+            "col",
+        )
+
+        # 4. Reordering and symbolic factorization of the technosphere matrix, reused for all samples, are done on
+        # the first solve, see get_solver
+        self.perm_filepath = perm_filepath
+        self.solver = None
+
+        # 5.-6. Converters, positions of all exchanges that change between samples and foreground update
+        self.prepare_sampled_exchanges()
+
+    def prepare_sampled_exchanges(self):
+        """Build all structures that depend on the selection of uncertain exchanges."""
+
+        # Converters from uniform samples to distributions of uncertain exchanges
+        self.tech_params_converter = SampleConverter(
+            self.lca.tech_params[self.uncertain_exchanges_dict["tech_params_where"]]
+        )
+        self.bio_params_converter = SampleConverter(
+            self.lca.bio_params[self.uncertain_exchanges_dict["bio_params_where"]]
+        )
+
+        # 5. Positions of all exchanges that change between samples
+        tech_params_where = [self.uncertain_exchanges_dict["tech_params_where"]]
+        bio_params_where = [self.uncertain_exchanges_dict["bio_params_where"]]
+        if self.parameters is not None and self.parameters_model is not None:
+            tech_params_where.append(self.parameterized_exchanges_dict["tech_params_where"])
+            bio_params_where.append(self.parameterized_exchanges_dict["bio_params_where"])
+        self.tech_params_where, self.tech_params_keep = self.merge_positions(
+            tech_params_where
+        )
+        self.bio_params_where, self.bio_params_keep = self.merge_positions(
+            bio_params_where
+        )
+
+        # 6. Background system is solved once for the foreground update on the first model_batch
+        self.foreground_update = None
+
+    def get_solver(self):
+        """
+        Solver with reordering and symbolic factorization of the technosphere matrix, reused for all samples. It is
+        built on the first solve, so that setups that only need num_vars do not analyze the matrix.
+        """
+        if self.solver is None:
+            self.solver = PatternSolver(
+                self.rebuild_technosphere_matrix(self.lca, self.lca.tech_params["amount"]),
+                perm_filepath=self.perm_filepath,
+            )
+        return self.solver
+
+    def num_vars(self):
+        """Number of columns of samples, ie groups of uncertain exchanges and parameters."""
+        num_vars = len(self.uncertain_exchanges_dict["group_names"])
+        if self.parameters is not None and self.parameters_model is not None:
+            num_vars += len(self.parameters_array)
+        return num_vars
+
+    def select_uncertain_exchanges(self, keep):
+        """
+        Keep only some uncertain exchanges, eg the influential ones after screening, and rebuild all structures
+        that depend on them. Parameters are always kept.
+
+        Attributes
+        ----------
+        keep : np.array
+            Boolean mask or indices of groups of uncertain exchanges in the order of columns of samples. Without
+            groups, each uncertain exchange is a group, technosphere exchanges followed by biosphere exchanges.
+
+        Returns
+        -------
+        uncertain_exchanges_dict : dict
+            Reduced dictionary of uncertain exchanges.
+
+        """
+
+        group_names = self.uncertain_exchanges_dict["group_names"]
+        mask = np.zeros(len(group_names), dtype=bool)
+        mask[keep] = True
+        # New indices of kept groups
+        new_index = np.cumsum(mask) - 1
+
+        for prefix in ["tech", "bio"]:
+            groups = self.uncertain_exchanges_dict["{}_params_groups".format(prefix)]
+            mask_prefix = mask[groups]
+            for key in ["{}_params_where".format(prefix), "{}_params_amounts".format(prefix)]:
+                self.uncertain_exchanges_dict[key] = self.uncertain_exchanges_dict[key][
+                    mask_prefix
+                ]
+            self.uncertain_exchanges_dict["{}_params_groups".format(prefix)] = new_index[
+                groups[mask_prefix]
+            ]
+        self.uncertain_exchanges_dict["group_names"] = [
+            name for name, m in zip(group_names, mask) if m
+        ]
+
+        self.prepare_sampled_exchanges()
+        return self.uncertain_exchanges_dict
+
+    def adjoint_derivatives(self, method_matrices):
+        """
+        Derivatives of scores of all methods with respect to amounts of all uncertain exchanges, at the amounts in
+        lca.tech_params and lca.bio_params.
+
+        With x = A^-1 d and lambda = A^-T B^T c for each method, derivatives of the score c^T B x are
+        -sign * lambda_row * x_col for technosphere exchanges and c_row * x_col for biosphere exchanges. This
+        requires one solve for x and one transposed solve with one right-hand side per method.
+
+        Returns
+        -------
+        scores : np.array
+            Scores with shape (n_methods,).
+        tech_derivatives, bio_derivatives : np.array
+            Derivatives with shape (n_methods, n_uncertain_exchanges).
+
+        """
+
+        characterization_matrix = stack_characterization_matrices(method_matrices)
+        tech_params, bio_params = self.lca.tech_params, self.lca.bio_params
+        A = self.rebuild_technosphere_matrix(self.lca, tech_params["amount"])
+        B = self.rebuild_biosphere_matrix(self.lca, bio_params["amount"]).copy()
+
+        CB = characterization_matrix @ B
+        solver = self.get_solver()
+        x = solver.solve(A, self.lca.demand_array).reshape(-1)
+        lambda_ = solver.solve_transposed(A, CB.T.toarray()).reshape(A.shape[0], -1)
+        scores = np.asarray(CB @ x).reshape(-1)
+
+        where = self.uncertain_exchanges_dict["tech_params_where"]
+        tech_derivatives = -(
+            self.tech_params_sign[where]
+            * lambda_[tech_params["row"][where]].T
+            * x[tech_params["col"][where]]
+        )
+
+        where = self.uncertain_exchanges_dict["bio_params_where"]
+        C = characterization_matrix.toarray()
+        bio_derivatives = C[:, bio_params["row"][where]] * x[bio_params["col"][where]]
+
+        return scores, tech_derivatives, bio_derivatives
+
+    def adjoint_importance(self, method_matrices, quantiles=(0.025, 0.975)):
+        """
+        Importance of uncertain exchanges as the first order change of scores over the uncertainty range of each
+        exchange, namely |derivative| * (amount at quantiles[1] - amount at quantiles[0]) / |score|. Importance
+        of a group of exchanges is the sum of importances of its members.
+
+        Returns
+        -------
+        importance : np.array
+            Highest importance over methods with shape (n_groups,), in the order of columns of samples. Without
+            groups, these are uncertain technosphere exchanges followed by uncertain biosphere exchanges.
+        importance_methods : np.array
+            Importance for each method with shape (n_methods, n_groups).
+
+        """
+
+        scores, tech_derivatives, bio_derivatives = self.adjoint_derivatives(method_matrices)
+
+        spreads = []
+        for converter in [self.tech_params_converter, self.bio_params_converter]:
+            bounds = converter.convert(
+                np.repeat(np.array(quantiles)[:, np.newaxis], converter.n_params, axis=1)
+            )
+            spreads.append(np.abs(bounds[1] - bounds[0]))
+        spread = np.hstack(spreads)
+
+        derivatives = np.hstack([tech_derivatives, bio_derivatives])
+        with np.errstate(invalid="ignore", divide="ignore"):
+            importance_exchanges = np.nan_to_num(
+                np.abs(derivatives) * spread / np.abs(scores)[:, np.newaxis]
+            )
+
+        groups = np.r_[
+            self.uncertain_exchanges_dict["tech_params_groups"],
+            self.uncertain_exchanges_dict["bio_params_groups"],
+        ]
+        importance_methods = np.zeros(
+            (scores.shape[0], len(self.uncertain_exchanges_dict["group_names"]))
+        )
+        np.add.at(importance_methods.T, groups, importance_exchanges.T)
+        return importance_methods.max(axis=0), importance_methods
+
+    def drop_negligible_exchanges(
+        self, method_matrices, threshold=1e-3, quantiles=(0.025, 0.975), verbose=False
+    ):
+        """
+        Keep only uncertain exchanges whose adjoint importance is at least threshold for at least one method, eg
+        before sampling. Parameters are always kept. If verbose is True, the number of kept exchanges is printed.
+
+        Returns
+        -------
+        keep : np.array
+            Indices of kept uncertain exchanges, see select_uncertain_exchanges.
+
+        """
+        importance, _ = self.adjoint_importance(method_matrices, quantiles)
+        keep = np.where(importance >= threshold)[0]
+        if verbose:
+            print(
+                "Keeping {} out of {} uncertain exchanges with adjoint importance above {}".format(
+                    keep.shape[0], importance.shape[0], threshold
+                )
+            )
+        self.select_uncertain_exchanges(keep)
+        return keep
 
     @staticmethod
-    def get_mask_unc_col(params, i):
+    def get_mask_unc_amt(params):
         mask = np.all(
             [
                 params["uncertainty_type"] != 0,
-                params["col"] == i,
+                params["amount"] != 0,
             ],
             axis=0,
         )
         return mask
 
     @staticmethod
-    def get_mask_row_col(params, i, j):
-        mask = np.where(
-            np.logical_and(
-                params["row"] == i,
-                params["col"] == j,
-            )
-        )
-        assert len(mask) == 1
-        return mask[0]
+    def get_mask_unc(params):
+        mask = params["uncertainty_type"] != 0
+        return mask
 
     @staticmethod
     def obtain_uncertain_exchanges(self, lca, options):
@@ -91,9 +313,9 @@ class GSAinLCA:
         indices_bio_all = np.array([], dtype=int)
 
         if options is None:
-            uncertain_exc_dict["tech_params_where"] = np.array([])
+            uncertain_exc_dict["tech_params_where"] = np.array([], dtype=int)
             uncertain_exc_dict["tech_params_amounts"] = np.array([])
-            uncertain_exc_dict["bio_params_where"] = np.array([])
+            uncertain_exc_dict["bio_params_where"] = np.array([], dtype=int)
             uncertain_exc_dict["bio_params_amounts"] = np.array([])
             return uncertain_exc_dict
 
@@ -111,57 +333,39 @@ class GSAinLCA:
                 if len(db_act_indices_tech) > 0:
                     db_act_index_min_tech = db_act_indices_tech[0]
                     db_act_index_max_tech = db_act_indices_tech[-1]
-                    indices_tech = [
-                        np.where(self.get_mask_unc_col_amt(lca.tech_params, i))[0]
-                        for i in range(db_act_index_min_tech, db_act_index_max_tech + 1)
+                    indices_tech = self.tech_params_index.positions_in_column_range(
+                        db_act_index_min_tech, db_act_index_max_tech + 1
+                    )
+                    indices_tech = indices_tech[
+                        self.get_mask_unc_amt(lca.tech_params[indices_tech])
                     ]
-                    indices_tech = np.concatenate(indices_tech)
 
-                # Indices corresponding to flows in the biosphere params depending on the given database
-                if "biosphere" in options:
-                    indices_bio = [
-                        np.where(self.get_mask_unc_col(lca.bio_params, j))[0]
-                        for j in range(db_act_index_min_tech, db_act_index_max_tech + 1)
-                    ]
-                    indices_bio = np.concatenate(indices_bio)
+                    # Indices corresponding to flows in the biosphere params depending on the given database
+                    if "biosphere" in options:
+                        indices_bio = self.bio_params_index.positions_in_column_range(
+                            db_act_index_min_tech, db_act_index_max_tech + 1
+                        )
+                        indices_bio = indices_bio[
+                            self.get_mask_unc(lca.bio_params[indices_bio])
+                        ]
 
             elif option == "demand_acts":
                 cols = np.where(lca.demand_array)[0]
                 # Indices corresponding to exchanges in the tech_params depending on the given demand
-                indices_tech = [
-                    np.where(self.get_mask_unc_col_amt(lca.tech_params, i))[0]
-                    for i in cols
+                indices_tech = self.tech_params_index.positions_in_columns(cols)
+                indices_tech = indices_tech[
+                    self.get_mask_unc_amt(lca.tech_params[indices_tech])
                 ]
-                indices_tech = np.concatenate(indices_tech)
 
                 # Indices corresponding to flows in the biosphere params depending on the given demand
-                indices_bio = [
-                    np.where(self.get_mask_unc_col_amt(lca.bio_params, i))[0]
-                    for i in cols
+                indices_bio = self.bio_params_index.positions_in_columns(cols)
+                indices_bio = indices_bio[
+                    self.get_mask_unc_amt(lca.bio_params[indices_bio])
                 ]
-                indices_bio = np.concatenate(indices_bio)
-
-            indices_tech = np.sort(indices_tech)
-            indices_bio = np.sort(indices_bio)
-
-            # Do not add indices_tech that are already in the indices_tech_all
-            indices_tech_same = np.intersect1d(indices_tech, indices_tech_all)
-            pos_tech = np.array(
-                [np.where(indices_tech == same)[0] for same in indices_tech_same]
-            ).flatten()
-            indices_tech = np.delete(indices_tech, pos_tech)
-            indices_tech_all = np.append(indices_tech_all, indices_tech)
-
-            # Do not add indices_bio that are already in the indices_bio_all
-            indices_bio_same = np.intersect1d(indices_bio, indices_bio_all)
-            pos_bio = np.array(
-                [np.where(indices_bio == s)[0] for s in indices_bio_same]
-            ).flatten()
-            indices_bio = np.delete(indices_bio, pos_bio)
-            indices_bio_all = np.append(indices_bio_all, indices_bio)
-
-        indices_tech_all = np.sort(indices_tech_all)
-        indices_bio_all = np.sort(indices_bio_all)
+
+            # Do not add indices that are already selected by previous options, union1d also sorts them
+            indices_tech_all = np.union1d(indices_tech_all, indices_tech).astype(int)
+            indices_bio_all = np.union1d(indices_bio_all, indices_bio).astype(int)
 
         uncertain_exc_dict["tech_params_where"] = indices_tech_all
         uncertain_exc_dict["tech_params_amounts"] = lca.tech_params["amount"][
@@ -183,6 +387,60 @@ class GSAinLCA:
 
         return uncertain_exc_dict
 
+    def obtain_groups(self, lca, groups):
+        """
+        Assign uncertain exchanges to groups, all exchanges of a group are driven by the same column of samples.
+
+        Attributes
+        ----------
+        groups : None, str, dict or np.array
+            None for one group per exchange, "activity" for one group per activity, ie all uncertain exchanges of
+            an activity, "database" for one group per database of activities, a dict that maps activity keys to
+            group names, where exchanges of other activities have their own group, or an array with group names of
+            all uncertain exchanges, technosphere exchanges followed by biosphere exchanges.
+
+        Returns
+        -------
+        groups_dict : dict
+            Group indices of uncertain technosphere and biosphere exchanges and names of groups in order of columns.
+
+        """
+
+        tech_where = self.uncertain_exchanges_dict["tech_params_where"]
+        bio_where = self.uncertain_exchanges_dict["bio_params_where"]
+        exchanges = [("technosphere", w) for w in tech_where] + [
+            ("biosphere", w) for w in bio_where
+        ]
+        cols = np.r_[lca.tech_params["col"][tech_where], lca.bio_params["col"][bio_where]]
+        reversed_activity_dict = {v: k for k, v in lca.activity_dict.items()}
+
+        if groups is None:
+            labels = exchanges
+        elif isinstance(groups, str) and groups == "activity":
+            labels = [reversed_activity_dict[col] for col in cols]
+        elif isinstance(groups, str) and groups == "database":
+            labels = [reversed_activity_dict[col][0] for col in cols]
+        elif isinstance(groups, dict):
+            labels = [
+                groups.get(reversed_activity_dict[col], exchange)
+                for col, exchange in zip(cols, exchanges)
+            ]
+        else:
+            labels = list(groups)
+            assert len(labels) == len(exchanges), "One group is needed per uncertain exchange"
+
+        # Groups are numbered in order of first appearance
+        group_index = {}
+        indices = np.array(
+            [group_index.setdefault(label, len(group_index)) for label in labels], dtype=int
+        )
+
+        groups_dict = dict()
+        groups_dict["tech_params_groups"] = indices[: tech_where.shape[0]]
+        groups_dict["bio_params_groups"] = indices[tech_where.shape[0]:]
+        groups_dict["group_names"] = list(group_index.keys())
+        return groups_dict
+
     def convert_named_parameters_to_array(self):
         """
         Convert parameters that are used in the parameterized exchanges to an np.array that contains uncertainty
@@ -222,9 +480,14 @@ class GSAinLCA:
         return parameters_array
 
     def obtain_parameterized_exchanges(self, lca, parameters, parameters_model):
+        """
+        Find positions of parameterized exchanges in tech_params and bio_params. Together with positions of
+        technosphere and biosphere exchanges in the output of ParametersModel, they form the write plan that is
+        applied to every sample without any string handling.
+        """
 
         exchanges = parameters_model.array_io
-        exchanges['amount'] = parameters_model.run(parameters)
+        exchanges['amount'] = parameters_model.run_batch(parameters)[:, 0]
 
         indices_tech = np.array([], dtype=int)
         indices_bio = np.array([], dtype=int)
@@ -232,50 +495,42 @@ class GSAinLCA:
         get_input = lambda exc: (exc["input_db"], exc["input_code"])
         get_output = lambda exc: (exc["output_db"], exc["output_code"])
 
-        exc_tech = np.array(
-            [exc for exc in exchanges if get_input(exc) in lca.activity_dict]
+        # Positions of technosphere and biosphere exchanges in the output of ParametersModel
+        model_rows_tech = np.array(
+            [i for i, exc in enumerate(exchanges) if get_input(exc) in lca.activity_dict],
+            dtype=int,
         )
+        model_rows_bio = np.array(
+            [i for i, exc in enumerate(exchanges) if get_input(exc) in lca.biosphere_dict],
+            dtype=int,
+        )
+
+        exc_tech = exchanges[model_rows_tech]
         if exc_tech.shape[0] != 0:
-            indices_tech = np.hstack(
-                [
-                    self.get_mask_row_col(
-                        lca.tech_params,
-                        lca.activity_dict[get_input(exc)],
-                        lca.activity_dict[get_output(exc)],
-                    )
-                    for exc in exc_tech
-                ]
+            indices_tech = self.tech_params_index.find(
+                [lca.activity_dict[get_input(exc)] for exc in exc_tech],
+                [lca.activity_dict[get_output(exc)] for exc in exc_tech],
             )
 
-        exc_bio = np.array(
-            [exc for exc in exchanges if get_input(exc) in lca.biosphere_dict]
-        )
+        exc_bio = exchanges[model_rows_bio]
         if exc_bio.shape[0] != 0:
-            indices_bio = np.hstack(
-                [
-                    self.get_mask_row_col(
-                        lca.bio_params,
-                        lca.biosphere_dict[get_input(exc)],
-                        lca.activity_dict[get_output(exc)],
-                    )
-                    for exc in exc_bio
-                ]
+            indices_bio = self.bio_params_index.find(
+                [lca.biosphere_dict[get_input(exc)] for exc in exc_bio],
+                [lca.activity_dict[get_output(exc)] for exc in exc_bio],
             )
 
         parameterized_exc_dict = dict()
         parameterized_exc_dict["tech_params_where"] = indices_tech
-        parameterized_exc_dict["tech_params_amounts"] = np.array(
-            [exc["amount"] for exc in exc_tech]
-        )
+        parameterized_exc_dict["tech_params_amounts"] = exc_tech["amount"].copy()
+        parameterized_exc_dict["tech_model_rows"] = model_rows_tech
         assert (
             parameterized_exc_dict["tech_params_where"].shape[0]
             == parameterized_exc_dict["tech_params_amounts"].shape[0]
         )
 
         parameterized_exc_dict["bio_params_where"] = indices_bio
-        parameterized_exc_dict["bio_params_amounts"] = np.array(
-            [exc["amount"] for exc in exc_bio]
-        )
+        parameterized_exc_dict["bio_params_amounts"] = exc_bio["amount"].copy()
+        parameterized_exc_dict["bio_model_rows"] = model_rows_bio
         assert (
             parameterized_exc_dict["bio_params_where"].shape[0]
             == parameterized_exc_dict["bio_params_amounts"].shape[0]
@@ -288,6 +543,7 @@ class GSAinLCA:
         """
         Map uniform samples on [0,1] to certain params and convert this sample to the correct distribution
         that is specified in the params np.array.
+        When the same params are converted many times, build a SampleConverter once instead.
 
         Attributes
         ----------
@@ -296,33 +552,17 @@ class GSAinLCA:
             stats_arrays.
             Can be in the same format as lca.tech_params.
         sample : np.array
-            Array that contains uniform samples on [0,1] with the same length as params.
+            Array that contains uniform samples on [0,1] with the same length as params, or a matrix of shape
+            (n_rows, len(params)) whose rows are all converted at once.
 
         Returns
         -------
         converted_sample : np.array
-            Sample with the correct distribution as specified in the params.
+            Sample with the correct distribution as specified in the params, same shape as sample.
 
         """
 
-        # Make sure that sample length is the same as the number of parameters  # TODO change for group sampling
-        assert len(params) == len(sample)
-
-        uncertainties_dict = dict(
-            [
-                (uncert_choice, params[u"uncertainty_type"] == uncert_choice.id)
-                for uncert_choice in sa.uncertainty_choices
-                if any(params[u"uncertainty_type"] == uncert_choice.id)
-            ]
-        )
-
-        converted_sample = np.empty(len(params))
-
-        for key in uncertainties_dict:
-            mask = uncertainties_dict[key]
-            converted_sample[mask] = convert_sample(
-                params[mask], sample[mask]
-            ).flatten()
+        converted_sample = SampleConverter(params).convert(sample)
 
         return converted_sample
 
@@ -332,132 +572,95 @@ class GSAinLCA:
 
         Attributes
         ----------
-        parameters : NamedParameters object
-            Contains parameters and their uncertainty information for the parameterization of exchanges.
+        parameters : dict
+            Contains values of parameters for the parameterization of exchanges, either floats or np.arrays of
+            the same length.
 
         Returns
         -------
-        A GSAinLCA object that contains updated self.parameters_dict.
+        tech_params_amounts, bio_params_amounts : np.array
+            Amounts of parameterized technosphere and biosphere exchanges with shape (n_rows, n_exchanges).
 
         """
 
-        exchanges = self.parameters_model.array_io
-        exchanges['amount'] = self.parameters_model.run(parameters)
+        amounts = self.parameters_model.run_batch(parameters)
 
-        get_input = lambda exc: (exc["input_db"], exc["input_code"])
-
-        exc_tech = np.array(
-            [exc for exc in exchanges if get_input(exc) in lca.activity_dict]
-        )
-        exc_bio = np.array(
-            [exc for exc in exchanges if get_input(exc) in lca.biosphere_dict]
-        )
-
-        tech_params_amounts = np.array([exc["amount"] for exc in exc_tech])
-        bio_params_amounts = np.array([exc["amount"] for exc in exc_bio])
+        # Apply write plan from obtain_parameterized_exchanges
+        tech_params_amounts = amounts[self.parameterized_exchanges_dict["tech_model_rows"]].T
+        bio_params_amounts = amounts[self.parameterized_exchanges_dict["bio_model_rows"]].T
 
         return tech_params_amounts, bio_params_amounts
 
-    def replace_parameterized_exchanges(self, sample):
+    def replace_parameterized_exchanges(self, X_chunk):
         """
-        Replace parameterized exchanges, namely replace self.amounts_tech and self.amounts_bio
-        after running the ParametersModel(parameters) with the new sample values for parameters.
+        Compute parameterized exchanges for all rows of X_chunk by running the ParametersModel once on arrays
+        of converted parameters.
 
         Attributes
         ----------
-        sample : np.array
-            Array that contains uniform samples on [0,1] with the same length as parameters.
+        X_chunk : np.array
+            Matrix that contains uniform samples on [0,1], one row per model evaluation.
 
         Returns
         -------
-        A GSAinLCA object that contains resampled values of self.amounts_tech and self.amounts_bio.
+        tech_params_amounts, bio_params_amounts : np.array
+            Amounts of parameterized exchanges with shape (n_rows, n_exchanges), to be placed in
+            self.amount_tech and self.amount_bio.
 
         """
 
         n_parameters = len(self.parameters_array)
 
-        parameters_subsample = sample[self.i_sample: self.i_sample + n_parameters]
+        parameters_subsample = X_chunk[:, self.i_sample: self.i_sample + n_parameters]
         self.i_sample += n_parameters
 
         # Convert uniform [0,1] sample to proper parameters distributions
-        converted_sample = self.convert_sample_to_proper_distribution(
-            self.parameters_array, parameters_subsample
-        )
-
-        converted_parameters = {}
+        converted_sample = self.parameters_converter.convert(parameters_subsample)
 
-        # Put converted values to parameters class, order of converted_parameters is the same as in parameters_array
-        for i in range(n_parameters):
-            name = self.parameters_array[i]["name"]
-            converted_parameters[name] = converted_sample[i]
+        # Order of converted_parameters is the same as in parameters_array
+        converted_parameters = {
+            name: converted_sample[:, i]
+            for i, name in enumerate(self.parameters_array["name"])
+        }
 
         # Update parameterized exchanges with the new converted values of parameters
-        tech_params_amounts, bio_params_amounts = self.update_parameterized_exchanges(
-            self.lca, converted_parameters
-        )
-
-        # Replace values in self.amounts_tech and self.amounts_bio
-        np.put(
-            self.amount_tech,
-            self.parameterized_exchanges_dict["tech_params_where"],
-            tech_params_amounts,
-        )
-        np.put(
-            self.amount_bio,
-            self.parameterized_exchanges_dict["bio_params_where"],
-            bio_params_amounts,
-        )
+        return self.update_parameterized_exchanges(self.lca, converted_parameters)
 
-    def replace_non_parameterized_exchanges(self, sample):
+    def replace_non_parameterized_exchanges(self, X_chunk):
         """
-        Replace non parameterized exchanges, namely replace values in self.amounts_tech and self.amounts_bio
-        with the new sample values for all self.inputs.
-        self.i_sample iterates over a sample to select subsamples of the correct length for each option in inputs.
+        Convert non parameterized exchanges for all rows of X_chunk with the new sample values for all self.inputs.
+        self.i_sample iterates over columns of X_chunk to select subsamples of the correct length for each option
+        in inputs. All exchanges of a group are converted from the same column.
 
         Attributes
         ----------
-        sample : np.array
-            Array that contains uniform samples on [0,1] with the values for all params in all inputs.
+        X_chunk : np.array
+            Matrix that contains uniform samples on [0,1] with the values for all params in all inputs,
+            one row per model evaluation.
 
         Returns
         -------
-        A GSAinLCA object that contains resampled values of self.amounts_tech and self.amounts_bio.
+        converted_tech_params, converted_bio_params : np.array
+            Amounts of uncertain exchanges with shape (n_rows, n_exchanges), to be placed in self.amount_tech and
+            self.amount_bio.
 
         """
 
-        # 1 Technosphere
-        tech_params_where = self.uncertain_exchanges_dict["tech_params_where"]
-        tech_params = self.lca.tech_params[tech_params_where]
-        tech_n_params = self.uncertain_exchanges_dict["tech_params_where"].shape[0]
-        tech_subsample = sample[self.i_sample: self.i_sample + tech_n_params]
+        # Uniform samples of groups, one column per group
+        n_groups = len(self.uncertain_exchanges_dict["group_names"])
+        groups_subsample = X_chunk[:, self.i_sample: self.i_sample + n_groups]
 
-        self.i_sample += tech_n_params
+        self.i_sample += n_groups
 
-        converted_tech_params = self.convert_sample_to_proper_distribution(
-            tech_params, tech_subsample
-        )
-        np.put(
-            self.amount_tech,
-            self.uncertain_exchanges_dict["tech_params_where"],
-            converted_tech_params,
-        )
+        # 1 Technosphere
+        tech_subsample = groups_subsample[:, self.uncertain_exchanges_dict["tech_params_groups"]]
+        converted_tech_params = self.tech_params_converter.convert(tech_subsample)
 
         # 2 Biosphere
-        bio_params_where = self.uncertain_exchanges_dict["bio_params_where"]
-        bio_params = self.lca.bio_params[bio_params_where]
-        bio_n_params = self.uncertain_exchanges_dict["bio_params_where"].shape[0]
-        bio_subsample = sample[self.i_sample: self.i_sample + bio_n_params]
-
-        self.i_sample += bio_n_params
+        bio_subsample = groups_subsample[:, self.uncertain_exchanges_dict["bio_params_groups"]]
+        converted_bio_params = self.bio_params_converter.convert(bio_subsample)
 
-        converted_bio_params = self.convert_sample_to_proper_distribution(
-            bio_params, bio_subsample
-        )
-        np.put(
-            self.amount_bio,
-            self.uncertain_exchanges_dict["bio_params_where"],
-            converted_bio_params,
-        )
+        return converted_tech_params, converted_bio_params
 
     @staticmethod
     def fix_supply_use(array, vector):
@@ -468,71 +671,228 @@ class GSAinLCA:
         return vector
 
     @staticmethod
-    def build_matrix(
+    def build_matrix_pattern(
         array,
         row_dict,
         col_dict,
         row_index_label,
         col_index_label,
-        data_label=None,
-        new_data=None,
     ):
-        """Build sparse matrix."""
-        vector = array[data_label] if new_data is None else new_data
-        assert vector.shape[0] == array.shape[0], "Incompatible data & indices"
-        # coo_matrix construction is coo_matrix((values, (rows, cols)),
-        # (row_count, col_count))
-        return sparse.coo_matrix(
+        """
+        Build CSR sparsity pattern once, together with the data slot of each element of the array.
+
+        Returns
+        -------
+        matrix : scipy.sparse.csr_matrix
+            Matrix with canonical CSR structure and zero data.
+        slots : np.array
+            Position in matrix.data for each element of the array. Duplicate (row, col) pairs share the same slot.
+
+        """
+        n_rows, n_cols = len(row_dict), len(col_dict)
+        linear_index = (
+            array[row_index_label].astype(np.int64) * n_cols + array[col_index_label]
+        )
+        # Sorted unique linear indices are ordered by row and then by column, as in CSR format
+        unique_index, slots = np.unique(linear_index, return_inverse=True)
+        indptr = np.zeros(n_rows + 1, dtype=np.int32)
+        np.cumsum(np.bincount(unique_index // n_cols, minlength=n_rows), out=indptr[1:])
+        matrix = sparse.csr_matrix(
             (
-                vector.astype(np.float64),
-                (array[row_index_label], array[col_index_label]),
+                np.zeros(unique_index.shape[0]),
+                (unique_index % n_cols).astype(np.int32),
+                indptr,
             ),
-            (len(row_dict), len(col_dict)),
-        ).tocsr()
+            shape=(n_rows, n_cols),
+        )
+        return matrix, slots.reshape(-1)
+
+    @staticmethod
+    def fill_matrix(matrix, slots, vector):
+        """Write new data into a matrix built with build_matrix_pattern, duplicate elements are summed."""
+        assert vector.shape[0] == slots.shape[0], "Incompatible data & indices"
+        if matrix.nnz == slots.shape[0]:
+            matrix.data[slots] = vector
+        else:
+            matrix.data[:] = np.bincount(slots, weights=vector, minlength=matrix.nnz)
+        return matrix
 
     def rebuild_technosphere_matrix(self, lca, vector):
-        A = self.build_matrix(
-            lca.tech_params,
-            lca._activity_dict,
-            lca._product_dict,
-            "row",
-            "col",
-            new_data=self.fix_supply_use(lca.tech_params, vector.copy()),
+        A = self.fill_matrix(
+            self.technosphere_matrix,
+            self.tech_params_slots,
+            self.tech_params_sign * vector,
         )
         return A
 
     def rebuild_biosphere_matrix(self, lca, vector):
-        B = self.build_matrix(
-            lca.bio_params,
-            lca._biosphere_dict,
-            lca._activity_dict,
-            "row",
-            "col",
-            new_data=vector,
-        )
+        B = self.fill_matrix(self.biosphere_matrix, self.bio_params_slots, vector)
         return B
 
-    def model(self, sample, method_matrices):
+    @staticmethod
+    def merge_positions(positions_list):
+        """
+        Merge positions of exchanges in params arrays.
+        If a position appears more than once, its last occurrence is kept, eg parameterized exchanges override
+        uncertain ones.
+
+        Returns
+        -------
+        positions : np.array
+            Sorted unique positions.
+        keep : np.array
+            Index of each unique position in the concatenation of positions_list.
+
+        """
+        positions = np.concatenate(
+            [np.asarray(p, dtype=int).reshape(-1) for p in positions_list]
+        )
+        n_positions = positions.shape[0]
+        positions, index_reversed = np.unique(positions[::-1], return_index=True)
+        keep = n_positions - 1 - index_reversed
+        return positions, keep
+
+    def build_foreground_update(self):
+        """
+        Prepare low rank update of the base system for exchanges in foreground columns, namely columns of
+        parameterized technosphere exchanges and of activities in the demand.
+        Changes of other technosphere exchanges require a full solve.
+        """
+
+        tech_params = self.lca.tech_params
+        bio_params = self.lca.bio_params
+
+        foreground_cols = np.where(self.lca.demand_array)[0]
+        if self.parameters is not None and self.parameters_model is not None:
+            foreground_cols = np.union1d(
+                foreground_cols,
+                tech_params["col"][self.parameterized_exchanges_dict["tech_params_where"]],
+            )
+        self.tech_params_foreground = np.isin(
+            tech_params["col"][self.tech_params_where], foreground_cols
+        )
+        where_fg = self.tech_params_where[self.tech_params_foreground]
+
+        A = self.rebuild_technosphere_matrix(self.lca, tech_params["amount"]).copy()
+        B = self.rebuild_biosphere_matrix(self.lca, bio_params["amount"]).copy()
+
+        return ForegroundUpdate(
+            A,
+            B,
+            self.lca.demand_array,
+            tech_rows=tech_params["row"][where_fg],
+            tech_cols=tech_params["col"][where_fg],
+            tech_base=self.tech_params_sign[where_fg] * tech_params["amount"][where_fg],
+            bio_rows=bio_params["row"][self.bio_params_where],
+            bio_cols=bio_params["col"][self.bio_params_where],
+            bio_base=bio_params["amount"][self.bio_params_where],
+            solver=self.get_solver(),
+        )
+
+    def sample_exchanges(self, X_chunk):
+        """
+        Convert X_chunk to new amounts of all exchanges that change between samples.
+
+        Returns
+        -------
+        tech_amounts, bio_amounts : np.array
+            Amounts with shape (n_rows, n_exchanges), columns correspond to self.tech_params_where and
+            self.bio_params_where.
+
+        """
 
-        self.amount_tech = self.lca.tech_params["amount"]
-        self.amount_bio = self.lca.bio_params["amount"]
+        n_rows = X_chunk.shape[0]
+        tech_amounts = [np.empty((n_rows, 0))]
+        bio_amounts = [np.empty((n_rows, 0))]
 
         self.i_sample = 0
         if self.options is not None:
-            self.replace_non_parameterized_exchanges(sample)
+            unc_tech_amounts, unc_bio_amounts = self.replace_non_parameterized_exchanges(
+                X_chunk
+            )
+            tech_amounts[0], bio_amounts[0] = unc_tech_amounts, unc_bio_amounts
         if self.parameters is not None and self.parameters_model is not None:
-            self.replace_parameterized_exchanges(sample)
+            par_tech_amounts, par_bio_amounts = self.replace_parameterized_exchanges(
+                X_chunk
+            )
+            tech_amounts.append(par_tech_amounts)
+            bio_amounts.append(par_bio_amounts)
+
+        # Same precision as amounts in params arrays
+        tech_amounts = np.hstack(tech_amounts)[:, self.tech_params_keep].astype(
+            self.lca.tech_params["amount"].dtype
+        )
+        bio_amounts = np.hstack(bio_amounts)[:, self.bio_params_keep].astype(
+            self.lca.bio_params["amount"].dtype
+        )
+
+        return tech_amounts, bio_amounts
+
+    def model(self, sample, method_matrices):
+        return self.model_batch(sample[np.newaxis, :], method_matrices)[0]
+
+    def model_batch(self, X_chunk, method_matrices):
+        """
+        Compute LCIA scores for all rows of X_chunk.
+        Conversion of samples and the ParametersModel run once for the whole chunk, while technosphere and
+        biosphere matrices are rebuilt and solved for each row.
+        If self.low_rank_update is True, rows that change only foreground exchanges are instead computed with
+        a low rank update of the base system.
+
+        Attributes
+        ----------
+        X_chunk : np.array
+            Matrix that contains uniform samples on [0,1], one row per model evaluation.
+        method_matrices : list or scipy.sparse.csr_matrix
+            Characterization matrices as generated by gen_characterization_matrices, or their stacked version
+            with shape (n_methods, n_biosphere).
+
+        Returns
+        -------
+        scores : np.array
+            LCIA scores with shape (n_rows, n_methods).
+
+        """
+
+        X_chunk = np.atleast_2d(X_chunk)
+        n_rows = X_chunk.shape[0]
+
+        tech_amounts, bio_amounts = self.sample_exchanges(X_chunk)
+
+        characterization_matrix = stack_characterization_matrices(method_matrices)
+
+        scores = np.empty((n_rows, characterization_matrix.shape[0]))
+        full_solve_rows = np.arange(n_rows)
+
+        if self.low_rank_update:
+            if self.foreground_update is None:
+                self.foreground_update = self.build_foreground_update()
+            fg = self.tech_params_foreground
+            background_base = self.lca.tech_params["amount"][self.tech_params_where[~fg]]
+            background_changed = np.any(tech_amounts[:, ~fg] != background_base, axis=1)
+            rows = np.where(~background_changed)[0]
+            if rows.shape[0] != 0:
+                scores[rows] = self.foreground_update.scores(
+                    self.tech_params_sign[self.tech_params_where[fg]]
+                    * tech_amounts[rows][:, fg],
+                    bio_amounts[rows],
+                    characterization_matrix,
+                )
+            full_solve_rows = np.where(background_changed)[0]
+
+        self.amount_tech = self.lca.tech_params["amount"].copy()
+        self.amount_bio = self.lca.bio_params["amount"].copy()
+
+        solver = self.get_solver()
+        for i in full_solve_rows:
+            np.put(self.amount_tech, self.tech_params_where, tech_amounts[i])
+            np.put(self.amount_bio, self.bio_params_where, bio_amounts[i])
 
-        A = self.rebuild_technosphere_matrix(self.lca, self.amount_tech)  # TODO change
-        B = self.rebuild_biosphere_matrix(self.lca, self.amount_bio)
+            A = self.rebuild_technosphere_matrix(self.lca, self.amount_tech)
+            B = self.rebuild_biosphere_matrix(self.lca, self.amount_bio)
 
-        env_flows = B * spsolve(A, self.lca.demand_array)
+            env_flows = B @ solver.solve(A, self.lca.demand_array)
 
-        scores = np.empty(len(method_matrices))
-        k = 0
-        for cf_matrix in method_matrices:
-            c = sum(cf_matrix)
-            scores[k] = c * env_flows
-            k += 1
+            scores[i] = characterization_matrix @ env_flows
 
         return scores
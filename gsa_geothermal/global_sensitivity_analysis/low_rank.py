@@ -0,0 +1,134 @@
+import numpy as np
+
+
+class ForegroundUpdate:
+    """
+    Compute LCIA scores exactly when, compared to base matrices A and B, only few technosphere elements change
+    in a small set of (foreground) columns, and any biosphere elements change.
+
+    Technosphere changes are written as A' = A + P_R D P_F^T, where R are rows and F are columns of changed
+    elements, and D has shape (len(R), len(F)). Following the Woodbury identity (Sherman-Morrison for one column):
+        y = P_F^T x = (I + P_F^T Z D)^-1 P_F^T x0,
+        x = x0 - Z D y,
+    where x0 = A^-1 d and Z = A^-1 P_R are computed once with len(R) + 1 sparse solves. Each sample then only
+    requires a dense len(F) x len(F) solve.
+
+    Attributes
+    ----------
+    A, B : scipy.sparse.csr_matrix
+        Base technosphere and biosphere matrices.
+    demand_array : np.array
+        Final demand.
+    tech_rows, tech_cols : np.array
+        Row and column indices in A of technosphere elements that change, all columns should be foreground.
+    tech_base : np.array
+        Values in A of these elements, ie with supply-use sign.
+    bio_rows, bio_cols : np.array
+        Row and column indices in B of biosphere elements that change.
+    bio_base : np.array
+        Values in B of these elements.
+    solver : PatternSolver
+        Solver for systems with base matrix A.
+
+    """
+
+    def __init__(
+        self,
+        A,
+        B,
+        demand_array,
+        tech_rows,
+        tech_cols,
+        tech_base,
+        bio_rows,
+        bio_cols,
+        bio_base,
+        solver,
+    ):
+        self.B = B
+        self.tech_base = np.asarray(tech_base, dtype=np.float64)
+        self.bio_rows = np.asarray(bio_rows, dtype=int)
+        self.bio_cols = np.asarray(bio_cols, dtype=int)
+        self.bio_base = np.asarray(bio_base, dtype=np.float64)
+
+        self.rows, self.rows_index = np.unique(
+            np.asarray(tech_rows, dtype=int), return_inverse=True
+        )
+        self.cols, self.cols_index = np.unique(
+            np.asarray(tech_cols, dtype=int), return_inverse=True
+        )
+        self.rows_index = self.rows_index.reshape(-1)
+        self.cols_index = self.cols_index.reshape(-1)
+
+        # Solve base system for the demand and for the unit vectors of all changed rows at once
+        n = A.shape[0]
+        rhs = np.zeros((n, self.rows.shape[0] + 1))
+        rhs[:, 0] = demand_array
+        rhs[self.rows, np.arange(1, self.rows.shape[0] + 1)] = 1
+        solution = solver.solve(A, rhs).reshape(n, -1)
+        self.x0 = solution[:, 0]
+        self.Z = solution[:, 1:]
+
+        self.x0_fg = self.x0[self.cols]
+        self.Z_fg = self.Z[self.cols, :]
+        self.x0_bio = self.x0[self.bio_cols]
+        self.Z_bio = self.Z[self.bio_cols, :]
+
+    def characterize(self, characterization_matrix):
+        """Precompute quantities that depend on the characterization matrix with shape (n_methods, n_biosphere)."""
+        CB = characterization_matrix @ self.B
+        g0 = np.asarray(CB @ self.x0).reshape(-1)
+        G = np.asarray(CB @ self.Z).reshape(g0.shape[0], -1)
+        C_bio = characterization_matrix[:, self.bio_rows]
+        C_bio = C_bio.toarray() if hasattr(C_bio, "toarray") else np.asarray(C_bio)
+        return g0, G, C_bio
+
+    def supply_foreground(self, tech_values):
+        """
+        Compute t = D y for each sample.
+
+        Attributes
+        ----------
+        tech_values : np.array
+            New values in A of the changed technosphere elements with shape (n_samples, n_elements).
+
+        Returns
+        -------
+        t : np.array
+            Array with shape (n_samples, len(R)), so that x = x0 - Z t.
+
+        """
+        delta = np.asarray(tech_values, dtype=np.float64) - self.tech_base
+        n_samples = delta.shape[0]
+        D = np.zeros((n_samples, self.rows.shape[0], self.cols.shape[0]))
+        for k in range(delta.shape[1]):
+            D[:, self.rows_index[k], self.cols_index[k]] += delta[:, k]
+        M = np.einsum("fr,srg->sfg", self.Z_fg, D)
+        M += np.eye(self.cols.shape[0])
+        y = np.linalg.solve(
+            M, np.broadcast_to(self.x0_fg, (n_samples, self.cols.shape[0]))[..., np.newaxis]
+        )[..., 0]
+        return np.einsum("srf,sf->sr", D, y)
+
+    def scores(self, tech_values, bio_values, characterization_matrix):
+        """
+        Compute LCIA scores with shape (n_samples, n_methods).
+
+        Attributes
+        ----------
+        tech_values : np.array
+            New values in A of the changed technosphere elements with shape (n_samples, n_tech_elements).
+        bio_values : np.array
+            New values in B of the changed biosphere elements with shape (n_samples, n_bio_elements).
+        characterization_matrix : scipy.sparse matrix or np.array
+            Characterization factors with shape (n_methods, n_biosphere).
+
+        """
+        g0, G, C_bio = self.characterize(characterization_matrix)
+        t = self.supply_foreground(tech_values)
+        scores = g0 - t @ G.T
+        if self.bio_rows.shape[0] != 0:
+            x_bio = self.x0_bio - t @ self.Z_bio.T
+            delta_bio = np.asarray(bio_values, dtype=np.float64) - self.bio_base
+            scores += (delta_bio * x_bio) @ C_bio.T
+        return scores
@@ -0,0 +1,67 @@
+import numpy as np
+
+
+class ParamsIndex:
+    """
+    Index over a params array, eg lca.tech_params or lca.bio_params, built once per LCA object.
+
+    Positions are sorted by column with offsets per column, as in the CSC format, so that selecting all exchanges
+    of a column or of a range of columns is a slice.
+    Positions are also sorted by (row, col) keys, so that many (row, col) pairs can be located at once with a binary
+    search instead of a linear scan of the params array per pair.
+
+    Attributes
+    ----------
+    params : np.array
+        Structured array with at least the fields 'row' and 'col'.
+
+    """
+
+    def __init__(self, params):
+        cols = params["col"].astype(np.int64)
+        self.n_cols = int(cols.max()) + 1 if cols.shape[0] != 0 else 0
+        self.order = np.argsort(cols, kind="stable")
+        self.offsets = np.zeros(self.n_cols + 1, dtype=np.int64)
+        np.cumsum(np.bincount(cols, minlength=self.n_cols), out=self.offsets[1:])
+
+        keys = params["row"].astype(np.int64) * self.n_cols + cols
+        self.keys_order = np.argsort(keys, kind="stable")
+        self.sorted_keys = keys[self.keys_order]
+
+    def positions_in_column_range(self, start, end):
+        """Positions of all elements with start <= col < end."""
+        start = min(max(start, 0), self.n_cols)
+        end = min(max(end, start), self.n_cols)
+        return self.order[self.offsets[start]: self.offsets[end]]
+
+    def positions_in_columns(self, cols):
+        """Positions of all elements in the given columns."""
+        cols = np.asarray(cols, dtype=np.int64)
+        cols = cols[(cols >= 0) & (cols < self.n_cols)]
+        if cols.shape[0] == 0:
+            return np.array([], dtype=self.order.dtype)
+        return np.concatenate(
+            [self.order[self.offsets[c]: self.offsets[c + 1]] for c in cols]
+        )
+
+    def find(self, rows, cols):
+        """
+        Positions of elements with the given (row, col) pairs. If a pair appears more than once in params, position
+        of its first occurrence is returned.
+        """
+        rows = np.asarray(rows, dtype=np.int64).reshape(-1)
+        cols = np.asarray(cols, dtype=np.int64).reshape(-1)
+        assert rows.shape == cols.shape, "Rows and cols must have the same length"
+        keys = rows * self.n_cols + cols
+        where = np.searchsorted(self.sorted_keys, keys)
+        where_clipped = np.minimum(where, max(self.sorted_keys.shape[0] - 1, 0))
+        found = (
+            (where < self.sorted_keys.shape[0])
+            & (cols >= 0)
+            & (cols < self.n_cols)
+        )
+        found[found] = self.sorted_keys[where_clipped[found]] == keys[found]
+        if not np.all(found):
+            missing = list(zip(rows[~found].tolist(), cols[~found].tolist()))
+            raise KeyError("(row, col) pairs not found in params: {}".format(missing))
+        return self.keys_order[where]
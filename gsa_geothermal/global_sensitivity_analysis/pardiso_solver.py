@@ -0,0 +1,120 @@
+import os
+import warnings
+import numpy as np
+from pathlib import Path
+from pypardiso import PyPardisoSolver
+
+
+class PatternSolver:
+    """
+    Solve sparse systems Ax=b for many matrices A that share the same sparsity pattern, eg technosphere matrices
+    of different samples.
+
+    Reordering and symbolic factorization (Pardiso phase 11) are done once in the constructor, and every new matrix
+    only requires numeric factorization (phase 22) and solve (phase 33). The fill-reducing ordering can be saved to
+    perm_filepath, so that other workers load it instead of recomputing it.
+
+    Attributes
+    ----------
+    A : scipy.sparse.csr_matrix
+        Square matrix with the sparsity pattern of all matrices that will be passed to solve.
+    perm_filepath : str or Path
+        Optional path of a .npy file with the fill-reducing ordering. If it exists, the ordering is loaded from it,
+        otherwise the ordering computed by Pardiso is saved to it.
+
+    """
+
+    def __init__(self, A, perm_filepath=None):
+
+        self.n = A.shape[0]
+        self.nnz = A.nnz
+        self.perm_filepath = Path(perm_filepath) if perm_filepath is not None else None
+
+        # Own solver instance, so that custom iparm values do not affect pypardiso.spsolve
+        self.solver = PyPardisoSolver()
+        # Use values in iparm instead of Pardiso defaults, values below are the defaults for real nonsymmetric
+        # matrices, see Pardiso documentation
+        self.solver.set_iparm(1, 1)
+        self.solver.set_iparm(2, 2)  # nested dissection ordering from METIS
+        self.solver.set_iparm(10, 13)  # pivot perturbation 1e-13
+        self.solver.set_iparm(11, 1)  # scaling
+        self.solver.set_iparm(13, 1)  # weighted matching
+
+        perm = self.load_perm()
+        if perm is not None:
+            self.solver.perm = perm
+            self.solver.set_iparm(5, 1)  # use user permutation
+        else:
+            self.solver.perm = np.zeros(self.n, dtype=np.int32)
+            self.solver.set_iparm(5, 2)  # return permutation computed by Pardiso
+
+        self.analyze(A)
+
+        if perm is None:
+            self.save_perm()
+        self.factorized_data = None
+
+    def load_perm(self):
+        if self.perm_filepath is None or not self.perm_filepath.exists():
+            return None
+        perm = np.load(self.perm_filepath).astype(np.int32)
+        if perm.shape[0] != self.n:
+            warnings.warn(
+                "Ordering in {} does not match matrix size, computing it again".format(
+                    self.perm_filepath
+                )
+            )
+            return None
+        return perm
+
+    def save_perm(self):
+        if self.perm_filepath is None:
+            return
+        self.perm_filepath.parent.mkdir(parents=True, exist_ok=True)
+        # Write to a temporary file first, so that workers never load a partially written ordering
+        temp_filepath = self.perm_filepath.with_name(
+            "{}.{}.tmp".format(self.perm_filepath.name, os.getpid())
+        )
+        with open(temp_filepath, "wb") as f:
+            np.save(f, self.solver.perm)
+        os.replace(temp_filepath, self.perm_filepath)
+
+    def analyze(self, A):
+        """Reordering and symbolic factorization."""
+        self.solver._check_A(A)
+        self.solver.set_phase(11)
+        self.solver._call_pardiso(A, np.zeros((self.n, 1)))
+
+    def factorize(self, A):
+        """Numeric factorization, reusing symbolic factorization."""
+        assert A.shape[0] == self.n and A.nnz == self.nnz, "Sparsity pattern has changed"
+        self.solver.set_phase(22)
+        self.solver._call_pardiso(A, np.zeros((self.n, 1)))
+        self.factorized_data = A.data.copy()
+
+    def solve(self, A, b):
+        """
+        Solve Ax=b for x, b can be a vector or a matrix with one right-hand side per column.
+        Numeric factorization is skipped if A has the same values as in the previous call.
+        """
+        if self.factorized_data is None or not np.array_equal(
+            A.data, self.factorized_data
+        ):
+            self.factorize(A)
+        b = self.solver._check_b(A, b)
+        self.solver.set_phase(33)
+        x = self.solver._call_pardiso(A, b)
+        return x
+
+    def solve_transposed(self, A, b):
+        """Solve A^T x = b for x with the factorization of A, eg for adjoint systems."""
+        self.solver.set_iparm(12, 2)  # solve transposed system
+        try:
+            x = self.solve(A, b)
+        finally:
+            self.solver.set_iparm(12, 0)
+        return x
+
+    def free_memory(self):
+        self.solver.free_memory(everything=True)
+        self.factorized_data = None
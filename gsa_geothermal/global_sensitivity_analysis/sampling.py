@@ -0,0 +1,130 @@
+import math
+import numpy as np
+from SALib.sample.directions import directions
+from SALib.util import scale_samples
+
+
+class SaltelliRows:
+    """
+    Generate any rows [start, end) of the design returned by SALib.sample.saltelli.sample(problem, N,
+    calc_second_order, skip_values), without building the full matrix with N*(D+2) or N*(2D+2) rows.
+
+    Each point of the base Sobol' sequence is computed directly from the Gray code of its index, which gives the
+    same values as the recursive construction in SALib.sample.sobol_sequence. Matrices A, AB_j, BA_j and B of the
+    blocks that overlap with [start, end) are then built on the fly, so that memory scales with the number of
+    requested rows.
+
+    Attributes
+    ----------
+    problem : dict
+        Problem definition in the SALib format, groups are not supported.
+    N : int
+        Number of base samples, see SALib.sample.saltelli.sample.
+    calc_second_order : bool
+        Whether design contains BA_j matrices for second order indices.
+    skip_values : int
+        Number of points in Sobol' sequence to skip, by default as in SALib.
+
+    """
+
+    scale = 31
+
+    def __init__(self, problem, N, calc_second_order=True, skip_values=None):
+        assert problem.get("groups") is None, "Groups are not supported"
+
+        if skip_values is None:
+            # Same default as in SALib
+            skip_values = int(2 ** math.ceil(math.log(N) / math.log(2)))
+            skip_values = max(skip_values, 16)
+
+        self.problem = problem
+        self.N = N
+        self.calc_second_order = calc_second_order
+        self.skip_values = skip_values
+        self.D = problem["num_vars"]
+        self.block_size = 2 * self.D + 2 if calc_second_order else self.D + 2
+        self.n_rows = N * self.block_size
+        self.direction_numbers = self.compute_direction_numbers(
+            N + skip_values, 2 * self.D
+        )
+
+    @classmethod
+    def compute_direction_numbers(cls, n_points, n_dimensions):
+        """Direction numbers V with shape (n_dimensions, L), where L is the number of bits to index n_points."""
+        if n_dimensions > len(directions) + 1:
+            raise ValueError("Error in Sobol sequence: not enough dimensions")
+        L = int(math.ceil(math.log(n_points) / math.log(2)))
+        if L > cls.scale:
+            raise ValueError("Error in Sobol sequence: not enough bits")
+
+        V = np.zeros((n_dimensions, L + 1), dtype=np.int64)
+        for i in range(n_dimensions):
+            if i == 0:
+                for j in range(1, L + 1):
+                    V[i, j] = 1 << (cls.scale - j)
+            else:
+                m = np.array(directions[i - 1], dtype=int)
+                a = m[0]
+                s = len(m) - 1
+                for j in range(1, min(L, s) + 1):
+                    V[i, j] = m[j] << (cls.scale - j)
+                for j in range(s + 1, L + 1):
+                    V[i, j] = V[i, j - s] ^ (V[i, j - s] >> s)
+                    for k in range(1, s):
+                        V[i, j] ^= ((a >> (s - 1 - k)) & 1) * V[i, j - k]
+        return V[:, 1:]
+
+    def sobol_points(self, indices):
+        """Points of the Sobol' sequence with the given indices, shape (len(indices), 2D)."""
+        gray = np.asarray(indices, dtype=np.int64)
+        gray = gray ^ (gray >> 1)
+        X = np.zeros((gray.shape[0], self.direction_numbers.shape[0]), dtype=np.int64)
+        for k in range(self.direction_numbers.shape[1]):
+            bit = ((gray >> k) & 1).astype(bool)
+            X[bit] ^= self.direction_numbers[:, k]
+        return X / math.pow(2, self.scale)
+
+    def rows(self, start, end):
+        """Rows [start, end) of the Saltelli design."""
+        start = min(max(start, 0), self.n_rows)
+        end = min(max(end, start), self.n_rows)
+        D = self.D
+
+        row_indices = np.arange(start, end)
+        blocks, positions = np.divmod(row_indices, self.block_size)
+        first_block = blocks[0] if blocks.shape[0] != 0 else 0
+        base = self.sobol_points(
+            np.arange(first_block, first_block + np.unique(blocks).shape[0])
+            + self.skip_values
+        )
+        base = base[blocks - first_block]
+        A, B = base[:, :D], base[:, D:]
+
+        # Which columns are taken from B, row by row
+        from_B = np.zeros((row_indices.shape[0], D), dtype=bool)
+        is_AB = (positions >= 1) & (positions <= D)
+        from_B[is_AB, positions[is_AB] - 1] = True
+        if self.calc_second_order:
+            is_BA = (positions >= D + 1) & (positions <= 2 * D)
+            from_B[is_BA] = True
+            from_B[is_BA, positions[is_BA] - D - 1] = False
+        from_B[positions == self.block_size - 1] = True
+
+        X = np.where(from_B, B, A)
+        return scale_samples(X, self.problem)
+
+    def chunk(self, n_workers, i_chunk, align_blocks=False):
+        """
+        Rows of chunk i_chunk when rows are split among n_workers, last worker takes the remaining rows.
+        If align_blocks is True, chunks contain only complete Saltelli blocks, eg for SobolAccumulator.
+        """
+        if align_blocks:
+            chunk_size = (self.N // n_workers) * self.block_size
+        else:
+            chunk_size = self.n_rows // n_workers
+        start = i_chunk * chunk_size
+        if i_chunk != n_workers - 1:
+            end = (i_chunk + 1) * chunk_size
+        else:
+            end = self.n_rows
+        return start, end, self.rows(start, end)
@@ -0,0 +1,100 @@
+import numpy as np
+from SALib.sample import morris
+
+
+def elementary_effects(X, Y):
+    """
+    Elementary effects of Morris trajectories for all methods at once.
+
+    Attributes
+    ----------
+    X : np.array
+        Trajectories with shape (num_trajectories*(D+1), D), each step changes one input.
+    Y : np.array
+        Scores with shape (num_trajectories*(D+1), n_methods).
+
+    Returns
+    -------
+    ee : np.array
+        Elementary effects with shape (num_trajectories, D, n_methods).
+
+    """
+    D = X.shape[1]
+    X = X.reshape(-1, D + 1, D)
+    Y = np.asarray(Y).reshape(X.shape[0], D + 1, -1)
+
+    delta_X = np.diff(X, axis=1)
+    delta_Y = np.diff(Y, axis=1)
+    # Input that changes at each step and its change
+    changed = np.argmax(np.abs(delta_X), axis=2)
+    delta = np.take_along_axis(delta_X, changed[:, :, np.newaxis], axis=2)
+
+    ee = np.zeros((X.shape[0], D, Y.shape[2]))
+    trajectories = np.repeat(np.arange(X.shape[0]), D)
+    ee[trajectories, changed.reshape(-1)] = (delta_Y / delta).reshape(-1, Y.shape[2])
+    return ee
+
+
+def morris_screening(gsa_in_lca, method_matrices, num_trajectories=10, num_levels=4, seed=None):
+    """
+    Elementary effects screening of all inputs of GSAinLCA, ie uncertain exchanges and parameters, with
+    num_trajectories*(D+1) model runs instead of N*(D+2) for Sobol indices.
+
+    Returns
+    -------
+    dict_ : dict
+        Contains mu_star and sigma with shape (n_methods, D), and ranking of inputs from the most to the least
+        influential, where importance of an input is its highest mu_star normalized by the highest mu_star of each
+        method.
+
+    """
+    D = gsa_in_lca.num_vars()
+    problem = {
+        'num_vars': D,
+        'names': np.arange(D),
+        'bounds': np.array([[0, 1]] * D),
+    }
+    X = morris.sample(problem, num_trajectories, num_levels=num_levels, seed=seed)
+    Y = gsa_in_lca.model_batch(X, method_matrices)
+
+    ee = elementary_effects(X, Y)
+    mu_star = np.abs(ee).mean(axis=0).T
+    sigma = ee.std(axis=0, ddof=1).T
+
+    with np.errstate(invalid="ignore", divide="ignore"):
+        importance = np.nan_to_num(mu_star / mu_star.max(axis=1, keepdims=True)).max(axis=0)
+    ranking = np.argsort(-importance, kind="stable")
+
+    return dict(mu_star=mu_star, sigma=sigma, importance=importance, ranking=ranking)
+
+
+def reduce_uncertain_exchanges(gsa_in_lca, screening_dict, threshold=0.01, n_keep=None, verbose=False):
+    """
+    Keep only uncertain exchanges of GSAinLCA whose importance after morris_screening is at least threshold, or
+    the n_keep most important ones. With groups, whole groups are kept. Parameters are always kept. If verbose is
+    True, the number of kept exchanges is printed.
+
+    Returns
+    -------
+    keep : np.array
+        Indices of kept uncertain exchanges, which can be passed to select_uncertain_exchanges of another GSAinLCA
+        object with the same options. Reduced dictionary of uncertain exchanges is in
+        gsa_in_lca.uncertain_exchanges_dict, and gsa_in_lca.num_vars() gives the new dimension of the problem.
+
+    """
+    n_uncertain = len(gsa_in_lca.uncertain_exchanges_dict["group_names"])
+    # Groups of uncertain exchanges are the first columns of samples
+    importance = screening_dict["importance"][:n_uncertain]
+    if n_keep is not None:
+        keep = np.argsort(-importance, kind="stable")[:n_keep]
+    else:
+        keep = np.where(importance >= threshold)[0]
+    if verbose:
+        print(
+            "Keeping {} out of {} uncertain exchanges after screening".format(
+                keep.shape[0], n_uncertain
+            )
+        )
+    keep = np.sort(keep)
+    gsa_in_lca.select_uncertain_exchanges(keep)
+    return keep
@@ -1,134 +1,499 @@
 import bw2calc as bc
+from bw2calc.utils import TYPE_DICTIONARY
 import numpy as np
 from copy import deepcopy
-from pypardiso import spsolve
+from concurrent.futures import ProcessPoolExecutor
+from scipy import sparse, stats
 
+# Local files
+from .low_rank import ForegroundUpdate
+from .pardiso_solver import PatternSolver
+from .params_index import ParamsIndex
 
-def gen_characterization_matrices(lca, methods):
+
+def gen_characterization_matrices(lca, methods, return_stacked=False):
     method_matrices = []
     for method in methods:
         lca.switch_method(method)
         method_matrices.append(lca.characterization_matrix)
-    return method_matrices
+    if return_stacked:
+        return method_matrices, stack_characterization_matrices(method_matrices)
+    else:
+        return method_matrices
+
+
+def stack_characterization_matrices(method_matrices):
+    """
+    Stack characterization factors of all methods in one CSR matrix with shape (n_methods, n_biosphere),
+    so that all methods are scored with one product. Already stacked matrices are returned as they are.
+    """
+    if sparse.issparse(method_matrices) or isinstance(method_matrices, np.ndarray):
+        return sparse.csr_matrix(method_matrices)
+    return sparse.csr_matrix(
+        np.vstack([np.asarray(m.sum(axis=0)).reshape(-1) for m in method_matrices])
+    )
 
 
 def model_per_X_chunk(X_chunk, gsa_in_lca, method_matrices):
-    scores = []
-    i = 0
-    for sample in X_chunk:
-        score = gsa_in_lca.model(sample, method_matrices)
-        scores.append(score)
-        i += 1
-    return np.array(scores)
+    return gsa_in_lca.model_batch(X_chunk, method_matrices)
 
 
 def separate_output_values(Y, D, N, calc_second_order):
-    AB = np.zeros((N, D))
-    BA = np.zeros((N, D)) if calc_second_order else None
+    """
+    Separate scores Y with shape (n_runs,) or (n_runs, n_methods) into A and B with shape (N, ...), and AB and BA
+    with shape (N, D, ...).
+    """
     step = 2 * D + 2 if calc_second_order else D + 2
+    Y = Y[:N * step].reshape((N, step) + Y.shape[1:])
 
-    A = Y[0:Y.size:step]
-    B = Y[(step - 1):Y.size:step]
-    for j in range(D):
-        AB[:, j] = Y[(j + 1):Y.size:step]
-        if calc_second_order:
-            BA[:, j] = Y[(j + 1 + D):Y.size:step]
+    A = Y[:, 0]
+    B = Y[:, step - 1]
+    AB = Y[:, 1:D + 1]
+    BA = Y[:, D + 1:2 * D + 1] if calc_second_order else None
 
     return A, B, AB, BA
 
 
 def first_order(A, AB, B):
     # First order estimator following Saltelli et al. 2010 CPC, normalized by
-    # sample variance
-    return np.mean(B * (AB - A), axis=0) / np.var(np.r_[A, B, AB], axis=0)
+    # sample variance, for all parameters at once along axis 1 of AB
+    A, B = A[:, np.newaxis], B[:, np.newaxis]
+    return np.mean(B * (AB - A), axis=0) / np.var(
+        np.concatenate(np.broadcast_arrays(A, B, AB)), axis=0
+    )
 #     return np.mean(B * (AB - A), axis=0) # in the paper
 
 
 def total_order(A, AB, B):
     # Total order estimator following Saltelli et al. 2010 CPC, normalized by
-    # sample variance
-    return 0.5 * np.mean((A - AB) ** 2, axis=0) / np.var(np.r_[A, AB], axis=0)
+    # sample variance, for all parameters at once along axis 1 of AB
+    A = A[:, np.newaxis]
+    return 0.5 * np.mean((A - AB) ** 2, axis=0) / np.var(
+        np.concatenate(np.broadcast_arrays(A, AB)), axis=0
+    )
 #     return 0.5 * np.mean((A - AB) ** 2, axis=0) # in the paper
 
 
-def my_sobol_analyze(problem, Y, calc_second_order):
+def second_order(A, AB, BA, B, parameters=None):
+    # Second order estimator following Saltelli 2002 CPC, as in SALib, for all pairs of parameters at once,
+    # shape (D, D) with values only above the diagonal. Scores are of one method. Optionally, only pairs of
+    # given parameters are considered. Scores are centered with their mean over the whole design, since the
+    # estimator is not invariant to a shift of scores, which gives the same indices as SALib with standardized Y
+    mean = np.mean(np.concatenate([A, B, AB.reshape(-1), BA.reshape(-1)]))
+    A, B, AB, BA = A - mean, B - mean, AB - mean, BA - mean
+    if parameters is not None:
+        AB, BA = AB[:, parameters], BA[:, parameters]
+    N = A.shape[0]
+    Vjk = BA.T @ AB / N - np.mean(A * B)
+    first = np.mean(B[:, np.newaxis] * (AB - A[:, np.newaxis]), axis=0)
+    S2 = (Vjk - first[:, np.newaxis] - first[np.newaxis, :]) / np.var(np.r_[A, B])
+    S2[np.tril_indices(S2.shape[0])] = np.nan
+    return S2
+
+
+def my_sobol_analyze(
+    problem,
+    Y,
+    calc_second_order,
+    num_resamples=None,
+    conf_level=0.95,
+    seed=None,
+    n_processes=None,
+    top_k=None,
+):
+    """
+    First and total order Sobol indices of scores Y with shape (n_runs,) or (n_runs, n_methods).
+    S1 and ST have shape (D,) or (n_methods, D).
+    If calc_second_order is True, second order indices S2 with shape (D, D) or (n_methods, D, D) are added. With
+    top_k, S2 is computed only for pairs of the top_k parameters with the highest total indices of each method,
+    S2 then has shape (top_k, top_k) or (n_methods, top_k, top_k), and S2_parameters contains the parameters.
+    If num_resamples is given, bootstrap confidence intervals S1_conf and ST_conf with the same shape are added,
+    see sobol_confidence_intervals.
+    """
 
     D = problem['num_vars']
-    if not calc_second_order:
-        N = Y.shape[0]//(D+2)
+    Y = np.asarray(Y)
+    N = Y.shape[0] // (2 * D + 2 if calc_second_order else D + 2)
 
     #     Y = (Y - Y.mean())/Y.std()
 
     A, B, AB, BA = separate_output_values(Y, D, N, calc_second_order)
-    f = np.zeros(D)
-    t = np.zeros(D)
-
-    for j in range(D):
-        t[j] = total_order(A, AB[:, j], B)
-        f[j] = first_order(A, AB[:, j], B)
+    f = first_order(A, AB, B).T
+    t = total_order(A, AB, B).T
 
     dict_ = dict(S1=f, ST=t)
 
+    if calc_second_order:
+        # One matrix product per method, so that memory scales with D**2 and not with n_methods*D**2
+        Y_shape = Y.shape
+        A, B = A.reshape(N, -1), B.reshape(N, -1)
+        AB, BA = AB.reshape(N, D, -1), BA.reshape(N, D, -1)
+        t_2d = t.reshape(-1, D)
+        S2, S2_parameters = [], []
+        for m in range(A.shape[1]):
+            parameters = None
+            if top_k is not None:
+                parameters = np.sort(np.argsort(-t_2d[m])[:top_k])
+                S2_parameters.append(parameters)
+            S2.append(second_order(A[:, m], AB[:, :, m], BA[:, :, m], B[:, m], parameters))
+        dict_["S2"] = np.array(S2) if len(Y_shape) == 2 else S2[0]
+        if top_k is not None:
+            dict_["S2_parameters"] = (
+                np.array(S2_parameters) if len(Y_shape) == 2 else S2_parameters[0]
+            )
+
+    if num_resamples is not None:
+        dict_.update(
+            sobol_confidence_intervals(
+                problem, Y, calc_second_order, num_resamples, conf_level, seed, n_processes
+            )
+        )
+
     return dict_
 
 
-def find_where_in_techparams(parameters, lca):
+def bootstrap_sobol_indices(W, terms):
+    """
+    First and total order indices for bootstrap resamples of Saltelli blocks.
+
+    Attributes
+    ----------
+    W : np.array
+        Number of times each block appears in each resample, shape (n_resamples, N).
+    terms : dict
+        Per block terms of the estimators, as computed in sobol_confidence_intervals.
+
+    Returns
+    -------
+    first, total : np.array
+        Indices with shape (n_resamples, D, n_methods).
+
+    """
+    N = W.shape[1]
+    shape = (W.shape[0], -1, terms["A"].shape[1])
+    sum_ = lambda key: (W @ terms[key]).reshape(shape)
+
+    sum_A, sum_B, sum_AB = sum_("A"), sum_("B"), sum_("AB")
+    sum_A2, sum_B2, sum_AB2 = sum_("A2"), sum_("B2"), sum_("AB2")
+
+    var_first = (sum_A2 + sum_B2 + sum_AB2) / (3 * N) - (
+        (sum_A + sum_B + sum_AB) / (3 * N)
+    ) ** 2
+    var_total = (sum_A2 + sum_AB2) / (2 * N) - ((sum_A + sum_AB) / (2 * N)) ** 2
+
+    first = sum_("first") / N / var_first
+    total = 0.5 * sum_("total") / N / var_total
+    return first, total
+
+
+def sobol_confidence_intervals(
+    problem,
+    Y,
+    calc_second_order,
+    num_resamples=100,
+    conf_level=0.95,
+    seed=None,
+    n_processes=None,
+):
+    """
+    Bootstrap confidence intervals of first and total order indices for scores Y with shape (n_runs,) or
+    (n_runs, n_methods), with the same convention as SALib, ie half-width conf_level interval of a normal
+    distribution with the standard deviation of bootstrap indices.
+
+    Saltelli blocks are resampled with replacement, so that each resample is a row of a matrix W with the number
+    of times each block is drawn. Sums over resampled blocks are then matrix products of W with per block terms
+    of the estimators, for all parameters and methods at once. Resamples can be split among n_processes.
+
+    Returns
+    -------
+    dict_ : dict
+        Contains S1_conf and ST_conf with shape (D,) or (n_methods, D).
+
+    """
 
-    def get_mask_tech(lca_, in_, out):
-        mask = np.where(
-            np.all(
-                [
-                    lca_.tech_params['row'] == in_,
-                    lca_.tech_params['col'] == out,
-                ],
-                axis=0
-            )
-        )[0][0]
-        return mask
-
-    def get_mask_bio(lca_, in_, out):
-        mask = np.where(
-            np.all(
-                [
-                    lca_.bio_params['row'] == in_,
-                    lca_.bio_params['col'] == out,
-                ],
-                axis=0
+    D = problem['num_vars']
+    Y = np.asarray(Y, dtype=np.float64)
+    N = Y.shape[0] // (2 * D + 2 if calc_second_order else D + 2)
+
+    A, B, AB, BA = separate_output_values(Y.reshape(Y.shape[0], -1), D, N, calc_second_order)
+    n_methods = A.shape[1]
+
+    # Variances are computed from sums of squares, center scores to avoid cancellation
+    shift = A.mean(axis=0)
+    a, b, ab = A - shift, B - shift, AB - shift
+    terms = dict(
+        A=a,
+        A2=a ** 2,
+        B=b,
+        B2=b ** 2,
+        AB=ab.reshape(N, -1),
+        AB2=(ab ** 2).reshape(N, -1),
+        first=(B[:, np.newaxis] * (AB - A[:, np.newaxis])).reshape(N, -1),
+        total=((A[:, np.newaxis] - AB) ** 2).reshape(N, -1),
+    )
+
+    rng = np.random.default_rng(seed)
+    W = rng.multinomial(N, np.full(N, 1 / N), size=num_resamples).astype(np.float64)
+
+    if n_processes is None or n_processes <= 1:
+        first, total = bootstrap_sobol_indices(W, terms)
+    else:
+        W_batches = np.array_split(W, n_processes)
+        with ProcessPoolExecutor(max_workers=n_processes) as executor:
+            results = list(
+                executor.map(bootstrap_sobol_indices, W_batches, [terms] * len(W_batches))
             )
-        )[0][0]
-        return mask
+        first = np.concatenate([r[0] for r in results])
+        total = np.concatenate([r[1] for r in results])
+
+    Z = stats.norm.ppf(0.5 + conf_level / 2)
+    first_conf = Z * first.std(axis=0, ddof=1).T
+    total_conf = Z * total.std(axis=0, ddof=1).T
+    if Y.ndim == 1:
+        first_conf, total_conf = first_conf[0], total_conf[0]
+
+    return dict(S1_conf=first_conf, ST_conf=total_conf)
+
+
+def combine_mean_m2(n_a, mean_a, m2_a, n_b, mean_b, m2_b):
+    """Combine counts, means and sums of squared deviations of two sets of values (Chan et al.)."""
+    n = n_a + n_b
+    if n == 0:
+        return n, mean_a, m2_a
+    delta = mean_b - mean_a
+    mean = mean_a + delta * n_b / n
+    m2 = m2_a + m2_b + delta ** 2 * n_a * n_b / n
+    return n, mean, m2
+
+
+def pooled_variance(n, means, m2s):
+    """Variance of the union of sets of n values each, given their means and sums of squared deviations."""
+    mean = sum(means) / len(means)
+    m2 = sum(m2s) + n * sum((m - mean) ** 2 for m in means)
+    return m2 / (n * len(means))
+
+
+class SobolAccumulator:
+    """
+    Running sums for first and total order Sobol indices with the estimators of my_sobol_analyze, for scores of
+    all methods at once.
+
+    Scores are added in Saltelli blocks, ie rows A, AB_1, ..., AB_D, (BA_1, ..., BA_D,) B of one base sample, in
+    any number of calls to update. Indices can be reported after any number of blocks in O(D), and accumulators
+    of different chunks of blocks can be merged.
+
+    Attributes
+    ----------
+    D : int
+        Number of parameters.
+    n_methods : int
+        Number of methods, ie columns of scores.
+    calc_second_order : bool
+        Whether scores contain rows of BA matrices.
+
+    """
+
+    def __init__(self, D, n_methods=1, calc_second_order=False):
+        self.D = D
+        self.n_methods = n_methods
+        self.calc_second_order = calc_second_order
+        self.step = 2 * D + 2 if calc_second_order else D + 2
+
+        self.n = 0
+        # Means and sums of squared deviations of A, B and AB_j
+        self.mean_A = np.zeros(n_methods)
+        self.m2_A = np.zeros(n_methods)
+        self.mean_B = np.zeros(n_methods)
+        self.m2_B = np.zeros(n_methods)
+        self.mean_AB = np.zeros((n_methods, D))
+        self.m2_AB = np.zeros((n_methods, D))
+        # Sums of B*(AB_j - A) and (A - AB_j)**2
+        self.sum_first = np.zeros((n_methods, D))
+        self.sum_total = np.zeros((n_methods, D))
+
+    def separate_blocks(self, Y):
+        """Reshape scores with shape (n_blocks*step,) or (n_blocks*step, n_methods) to A, B and AB."""
+        Y = np.asarray(Y, dtype=np.float64).reshape(-1, self.n_methods)
+        assert Y.shape[0] % self.step == 0, "Scores should contain complete Saltelli blocks"
+        Y = Y.reshape(-1, self.step, self.n_methods)
+        A = Y[:, 0, :]
+        B = Y[:, -1, :]
+        AB = Y[:, 1: self.D + 1, :].transpose(0, 2, 1)
+        return A, B, AB
+
+    def update(self, Y):
+        """Add scores of complete Saltelli blocks."""
+        A, B, AB = self.separate_blocks(Y)
+        n = A.shape[0]
+        if n == 0:
+            return self
+
+        mean_A, mean_B, mean_AB = A.mean(axis=0), B.mean(axis=0), AB.mean(axis=0)
+        _, self.mean_A, self.m2_A = combine_mean_m2(
+            self.n, self.mean_A, self.m2_A, n, mean_A, ((A - mean_A) ** 2).sum(axis=0)
+        )
+        _, self.mean_B, self.m2_B = combine_mean_m2(
+            self.n, self.mean_B, self.m2_B, n, mean_B, ((B - mean_B) ** 2).sum(axis=0)
+        )
+        _, self.mean_AB, self.m2_AB = combine_mean_m2(
+            self.n, self.mean_AB, self.m2_AB, n, mean_AB, ((AB - mean_AB) ** 2).sum(axis=0)
+        )
+        self.sum_first += np.einsum("nm,nmd->md", B, AB - A[:, :, np.newaxis])
+        self.sum_total += ((A[:, :, np.newaxis] - AB) ** 2).sum(axis=0)
+        self.n += n
+        return self
+
+    def merge(self, other):
+        """Add running sums of another accumulator, eg of another chunk of blocks."""
+        assert (self.D, self.n_methods) == (other.D, other.n_methods)
+        _, self.mean_A, self.m2_A = combine_mean_m2(
+            self.n, self.mean_A, self.m2_A, other.n, other.mean_A, other.m2_A
+        )
+        _, self.mean_B, self.m2_B = combine_mean_m2(
+            self.n, self.mean_B, self.m2_B, other.n, other.mean_B, other.m2_B
+        )
+        _, self.mean_AB, self.m2_AB = combine_mean_m2(
+            self.n, self.mean_AB, self.m2_AB, other.n, other.mean_AB, other.m2_AB
+        )
+        self.sum_first += other.sum_first
+        self.sum_total += other.sum_total
+        self.n += other.n
+        return self
+
+    @classmethod
+    def combine(cls, accumulators):
+        """Merge accumulators of different chunks of blocks, eg returned by dask workers, into a new one."""
+        accumulators = list(accumulators)
+        combined = cls(
+            accumulators[0].D, accumulators[0].n_methods, accumulators[0].calc_second_order
+        )
+        for accumulator in accumulators:
+            combined.merge(accumulator)
+        return combined
+
+    def indices(self):
+        """
+        First and total order indices for the blocks added so far.
+
+        Returns
+        -------
+        dict_ : dict
+            Contains S1 and ST with shape (n_methods, D).
+
+        """
+        mean_A, m2_A = self.mean_A[:, np.newaxis], self.m2_A[:, np.newaxis]
+        mean_B, m2_B = self.mean_B[:, np.newaxis], self.m2_B[:, np.newaxis]
+        var_first = pooled_variance(
+            self.n, [mean_A, mean_B, self.mean_AB], [m2_A, m2_B, self.m2_AB]
+        )
+        var_total = pooled_variance(self.n, [mean_A, self.mean_AB], [m2_A, self.m2_AB])
+        first = self.sum_first / self.n / var_first
+        total = 0.5 * self.sum_total / self.n / var_total
+        return dict(S1=first, ST=total)
+
+
+def sobol_convergence(problem, Y, Ns, calc_second_order):
+    """
+    First and total order indices for the first N Saltelli blocks of Y, for all N in Ns, with one pass over Y.
+
+    Returns
+    -------
+    dict_ : dict
+        Contains S1 and ST with shape (len(Ns), n_methods, D).
+
+    """
+    D = problem['num_vars']
+    Y = np.asarray(Y)
+    n_methods = Y.shape[1] if Y.ndim == 2 else 1
+    accumulator = SobolAccumulator(D, n_methods, calc_second_order)
+
+    first = np.zeros((len(Ns), n_methods, D))
+    total = np.zeros((len(Ns), n_methods, D))
+    n_previous = 0
+    for i, n in enumerate(Ns):
+        assert n >= n_previous, "Ns should be sorted"
+        accumulator.update(Y[n_previous * accumulator.step: n * accumulator.step])
+        n_previous = n
+        dict_ = accumulator.indices()
+        first[i], total[i] = dict_["S1"], dict_["ST"]
+
+    return dict(S1=first, ST=total)
+
+
+def find_where_in_techparams(parameters, lca, tech_params_index=None, bio_params_index=None):
+    """Find positions of parameterized exchanges in lca.tech_params and lca.bio_params, and their amounts."""
+
+    if tech_params_index is None:
+        tech_params_index = ParamsIndex(lca.tech_params)
+    if bio_params_index is None:
+        bio_params_index = ParamsIndex(lca.bio_params)
+
+    parameters_tech = [p for p in parameters if p[0][0] != 'biosphere3']
+    parameters_bio = [p for p in parameters if p[0][0] == 'biosphere3']
 
-    n_parameters = len(parameters)
     where_tech = np.array([], dtype=int)
     amt_tech = np.array([])
     where_bio = np.array([], dtype=int)
     amt_bio = np.array([])
-    for j in range(n_parameters):
-        if parameters[j][0][0] != 'biosphere3':
-            input_ = lca.activity_dict[parameters[j][0]]
-            output_ = lca.activity_dict[parameters[j][1]]
-            mask_ = get_mask_tech(lca, input_, output_)
-            where_tech = np.append(where_tech, mask_)
-            amt_tech = np.append(amt_tech, parameters[j][2])
-        else:
-            input_ = lca.biosphere_dict[parameters[j][0]]
-            output_ = lca.activity_dict[parameters[j][1]]
-            mask_ = get_mask_bio(lca, input_, output_)
-            where_bio = np.append(where_bio, mask_)
-            amt_bio = np.append(amt_bio, parameters[j][2])
-
-    if amt_tech.shape[0] != 0:
-        amt_tech = amt_tech.reshape([len(where_tech), -1])
-    if amt_bio.shape[0] != 0:
-        amt_bio = amt_bio.reshape([len(where_bio), -1])
+
+    if len(parameters_tech) != 0:
+        where_tech = tech_params_index.find(
+            [lca.activity_dict[p[0]] for p in parameters_tech],
+            [lca.activity_dict[p[1]] for p in parameters_tech],
+        )
+        amt_tech = np.array([np.ravel(p[2]) for p in parameters_tech])
+    if len(parameters_bio) != 0:
+        where_bio = bio_params_index.find(
+            [lca.biosphere_dict[p[0]] for p in parameters_bio],
+            [lca.activity_dict[p[1]] for p in parameters_bio],
+        )
+        amt_bio = np.array([np.ravel(p[2]) for p in parameters_bio])
 
     return where_tech, amt_tech, where_bio, amt_bio
 
 
-def run_monte_carlo(parameters, demand, methods, iterations):
-    """Parameters has the format presamples, and is the output from cge or ege model."""
+def find_where_in_array_io(amounts, array_io, lca, tech_params_index=None, bio_params_index=None):
+    """
+    Same as find_where_in_techparams for amounts with shape (n_exchanges, iterations) whose rows are aligned with
+    array_io, eg the output of run_batch of cge or ege model.
+    """
+
+    if tech_params_index is None:
+        tech_params_index = ParamsIndex(lca.tech_params)
+    if bio_params_index is None:
+        bio_params_index = ParamsIndex(lca.bio_params)
+
+    is_bio = array_io["input_db"] == "biosphere3"
+    exchanges_tech, exchanges_bio = array_io[~is_bio], array_io[is_bio]
+
+    where_tech = tech_params_index.find(
+        [lca.activity_dict[(e["input_db"], e["input_code"])] for e in exchanges_tech],
+        [lca.activity_dict[(e["output_db"], e["output_code"])] for e in exchanges_tech],
+    )
+    where_bio = bio_params_index.find(
+        [lca.biosphere_dict[(e["input_db"], e["input_code"])] for e in exchanges_bio],
+        [lca.activity_dict[(e["output_db"], e["output_code"])] for e in exchanges_bio],
+    )
+
+    return where_tech, amounts[~is_bio], where_bio, amounts[is_bio]
+
 
-    assert iterations == len(parameters[0][2])
+def run_monte_carlo(
+    parameters, demand, methods, iterations, low_rank_update=False, batch_size=10000, array_io=None
+):
+    """
+    Parameters has the format presamples, and is the output from cge or ege model. If array_io is given, parameters
+    is instead the matrix with shape (n_exchanges, iterations) returned by run_batch of the same model.
+
+    If low_rank_update is True, only parameterized exchanges change while the background stays the same, so scores of
+    all iterations are computed exactly from one multi-RHS solve of the base system, see ForegroundUpdate, in batches
+    of batch_size iterations. Otherwise the technosphere system is solved once per iteration.
+    """
+
+    if array_io is not None:
+        assert iterations == parameters.shape[1]
+    else:
+        assert iterations == len(parameters[0][2])
 
     lca = bc.LCA(demand)
     lca.lci()
@@ -137,36 +502,67 @@ def run_monte_carlo(parameters, demand, methods, iterations):
     tech_params = lca.tech_params['amount']
     bio_params = lca.bio_params['amount']
 
-    method_matrices = gen_characterization_matrices(lca, methods)
-    characterization_matrices = [sum(m) for m in method_matrices]
-
-    where_tech, amt_tech, where_bio, amt_bio = find_where_in_techparams(parameters, lca)
-
     # This enables the code to work if only one method is passed as tuple
     if type(methods) == tuple:
         methods = [methods]
 
-    nan_array = np.empty(iterations)
-    nan_array[:] = np.nan
-    scores = {method[-2]: deepcopy(nan_array) for method in methods}
+    _, characterization_matrix = gen_characterization_matrices(
+        lca, methods, return_stacked=True
+    )
+
+    if array_io is not None:
+        where_tech, amt_tech, where_bio, amt_bio = find_where_in_array_io(parameters, array_io, lca)
+    else:
+        where_tech, amt_tech, where_bio, amt_bio = find_where_in_techparams(parameters, lca)
+    amt_tech = amt_tech.reshape(-1, iterations)
+    amt_bio = amt_bio.reshape(-1, iterations)
+
+    # Sparsity pattern of the technosphere matrix is the same in all iterations
+    solver = PatternSolver(lca.technosphere_matrix)
+
+    scores_array = np.empty((iterations, len(methods)))
+    scores_array[:] = np.nan
+
+    if low_rank_update:
+        # Inputs are consumed, so are negative in the technosphere matrix
+        tech_sign = np.where(
+            lca.tech_params['type'][where_tech] == TYPE_DICTIONARY["technosphere"], -1.0, 1.0
+        )
+        foreground_update = ForegroundUpdate(
+            lca.technosphere_matrix,
+            lca.biosphere_matrix,
+            demand_array,
+            tech_rows=lca.tech_params['row'][where_tech],
+            tech_cols=lca.tech_params['col'][where_tech],
+            tech_base=tech_sign * tech_params[where_tech],
+            bio_rows=lca.bio_params['row'][where_bio],
+            bio_cols=lca.bio_params['col'][where_bio],
+            bio_base=bio_params[where_bio],
+            solver=solver,
+        )
+        for start in range(0, iterations, batch_size):
+            end = min(start + batch_size, iterations)
+            scores_array[start:end] = foreground_update.scores(
+                tech_sign * amt_tech[:, start:end].T,
+                amt_bio[:, start:end].T,
+                characterization_matrix,
+            )
 
-    for i in range(iterations):
+    else:
+        for i in range(iterations):
 
-        if where_tech.shape[0] != 0:
-            np.put(tech_params, where_tech, amt_tech[:, i])
-            lca.rebuild_technosphere_matrix(tech_params)
+            if where_tech.shape[0] != 0:
+                np.put(tech_params, where_tech, amt_tech[:, i])
+                lca.rebuild_technosphere_matrix(tech_params)
 
-        if where_bio.shape[0] != 0:
-            np.put(bio_params, where_bio, amt_bio[:, i])
-            lca.rebuild_biosphere_matrix(bio_params)
+            if where_bio.shape[0] != 0:
+                np.put(bio_params, where_bio, amt_bio[:, i])
+                lca.rebuild_biosphere_matrix(bio_params)
 
-        # scores_m = np.zeros(parameters.iterations)
-        for i_method, method in enumerate(methods):
-            lca.switch_method(method)
-            score = (
-                (characterization_matrices[i_method] * lca.biosphere_matrix) *
-                spsolve(lca.technosphere_matrix, demand_array)
-            )
-            scores[method[-2]][i] = score
+            # One solve per iteration, all methods are scored from the same inventory
+            inventory = lca.biosphere_matrix @ solver.solve(lca.technosphere_matrix, demand_array)
+            scores_array[i] = characterization_matrix @ inventory
+
+    scores = {method[-2]: deepcopy(scores_array[:, i_method]) for i_method, method in enumerate(methods)}
 
     return scores
@@ -105,8 +105,9 @@ def save_dict_json(dict_, path):
     dict_save = {}
     for k, v in dict_.items():
         if type(v) == dict:
-            v['S1'] = list(v['S1'])
-            v['ST'] = list(v['ST'])
+            for key in ['S1', 'ST', 'S1_conf', 'ST_conf', 'S2', 'S2_parameters', 'PAWN']:
+                if key in v:
+                    v[key] = np.asarray(v[key]).tolist()
         dict_save[k] = v
     with open(path, 'w') as f:
         json.dump(dict_save, f)
@@ -1,12 +1,20 @@
 import bw2data as bd
 import bw2calc as bc
+import hashlib
 import numpy as np
 import pandas as pd
+import pickle
+from pathlib import Path
 from sympy import symbols
 
 # Local
 from ..utils import lookup_geothermal, get_lcia_results, get_EF_methods
 from ..global_sensitivity_analysis import my_sobol_analyze
+from .model_forms import MODEL_FORMS
+
+# Version of the derivation of simplified models, change it whenever get_simplified_model or model forms change,
+# so that cached coefficients are derived again
+CACHE_VERSION = 1
 
 
 class GeothermalSimplifiedModel:
@@ -37,10 +45,11 @@ class GeothermalSimplifiedModel:
 
         scores = get_lcia_results(path)
         sa_dict = dict(parameters=parameters_list)
+        # Indices of all methods at once
+        sa_all = my_sobol_analyze(problem, scores[:, :len(methods)], calc_second_order)
         for i, method in enumerate(methods):
             method_name = method[-2]
-            Y = scores[:, i]
-            sa_dict[method_name] = my_sobol_analyze(problem, Y, calc_second_order)
+            sa_dict[method_name] = dict(S1=sa_all["S1"][i], ST=sa_all["ST"][i])
 
         # Extract total index into a dictionary and dataframe
         total_dict = dict()
@@ -313,29 +322,104 @@ class GeothermalSimplifiedModel:
 
         return par_dict
 
-    def run(self, parameters_sto, simplified_model_dict, lcia_methods=None):
-        """Run simplified model."""
-        if lcia_methods is None:
-            lcia_methods = self.methods
+    def get_cache_key(self, group):
+        """
+        Hash of everything that the symbolic derivation of one group of methods depends on, namely i coefficients of
+        its methods, the substitution dictionary, the exploration flag, the characterization factor of methane, the
+        set of influential parameters and the version of the derivation.
+        """
+        i_coeff_matrix = self.i_coeff_matrix.loc[group["methods"]]
+        items = [
+            CACHE_VERSION,
+            self.option,
+            self.exploration,
+            getattr(self, "ch4", False),
+            float(getattr(self, "ch4_cf", 0)),
+            sorted(group["parameters"]),
+            list(i_coeff_matrix.index),
+            list(i_coeff_matrix.columns),
+            i_coeff_matrix.values.astype(np.float64).tolist(),
+            sorted((k, float(v)) for k, v in self.par_subs_dict.items()),
+        ]
+        return hashlib.sha256(repr(items).encode()).hexdigest()
 
-        results = dict()
-        for method in lcia_methods:
-            s_const = simplified_model_dict[method[-2]]["s_const"]
-            # if ch4 and method[-2] == "climate change no LT":
-            #     s_model = simplified_model_dict[method[-2]]["s_model_ch4"]
-            # else:
-            #     s_model = simplified_model_dict[method[-2]]["s_model"]
-            s_model = simplified_model_dict[method[-2]]["s_model"]
-            res = s_model(s_const, parameters_sto)
-
-            if isinstance(res, np.ndarray):
-                res = res.astype("float")
+    def get_cached_simplified_model(self, cache_dir=None):
+        """
+        Derive coefficients and forms of simplified models with get_simplified_model, group by group. If cache_dir is
+        given, coefficients and forms of each group are saved there, and loaded instead of derived in later
+        constructions with the same cache key.
+        """
+        if cache_dir is not None:
+            cache_dir = Path(cache_dir)
+            cache_dir.mkdir(parents=True, exist_ok=True)
+
+        simplified_model_dict = dict()
+        for group in self.methods_groups:
+            filepath = None
+            if cache_dir is not None:
+                filepath = cache_dir / "{}.{}.pkl".format(self.option, self.get_cache_key(group))
+            if filepath is not None and filepath.exists():
+                with open(filepath, "rb") as f:
+                    group_dict = pickle.load(f)
             else:
-                res = float(res)
+                group_dict = self.get_simplified_model(methods_groups=[group])
+                group_dict = {
+                    method: dict(
+                        s_const={k: float(v) for k, v in model["s_const"].items()},
+                        s_form=model["s_form"],
+                    )
+                    for method, model in group_dict.items()
+                }
+                if filepath is not None:
+                    with open(filepath, "wb") as f:
+                        pickle.dump(group_dict, f)
+            simplified_model_dict.update(group_dict)
+
+        return simplified_model_dict
+
+    @staticmethod
+    def compile_simplified_model(simplified_model_dict):
+        """
+        Convert coefficients of all methods to floats, and stack them in float64 matrices with shape
+        (n_coefficients, n_methods) for all methods that share the same form of simplified model.
+        """
+        compiled_model = dict()
+        for method, model in simplified_model_dict.items():
+            model["s_const"] = {k: float(v) for k, v in model["s_const"].items()}
+            compiled_model.setdefault(model["s_form"], dict(methods=[], coeff=[]))
+            compiled_model[model["s_form"]]["methods"].append(method)
+            compiled_model[model["s_form"]]["coeff"].append(
+                [model["s_const"][k] for k in sorted(model["s_const"])]
+            )
+        for form in compiled_model.values():
+            form["coeff"] = np.array(form["coeff"], dtype=np.float64).T
+        return compiled_model
 
-            results[method[-2]] = res
+    def run(self, parameters_sto, compiled_model, lcia_methods=None):
+        """Run simplified model, each form of simplified model is evaluated once for all its methods."""
+        if lcia_methods is None:
+            lcia_methods = self.methods
+        method_names = [method[-2] for method in lcia_methods]
 
-        return results
+        results = dict()
+        for s_form, form in compiled_model.items():
+            if not set(form["methods"]).intersection(method_names):
+                continue
+            model_form = MODEL_FORMS[s_form]
+            values = []
+            for name in model_form["parameters"]:
+                try:
+                    value = parameters_sto[name]
+                except (KeyError, ValueError):
+                    value = model_form["defaults"][name]
+                # Trailing axis for methods
+                values.append(np.asarray(value, dtype=np.float64)[..., np.newaxis])
+            res = model_form["function"](form["coeff"], *values)
+
+            for i, method_name in enumerate(form["methods"]):
+                results[method_name] = res[..., i] if res.ndim > 1 else float(res[i])
+
+        return {method_name: results[method_name] for method_name in method_names}
 
     def get_coeff(self, simplified_model_dict, lcia_methods=None):
 
@@ -9,7 +9,7 @@ from .base import GeothermalSimplifiedModel
 
 class ConventionalSimplifiedModel(GeothermalSimplifiedModel):
     """Conventional simplified model CHILD class"""
-    def __init__(self, setup_geothermal_gsa, path, threshold, exploration=True, ch4=True):
+    def __init__(self, setup_geothermal_gsa, path, threshold, exploration=True, ch4=True, cache_dir=None):
         super(ConventionalSimplifiedModel, self).__init__(
             setup_geothermal_gsa=setup_geothermal_gsa,
             path=path,
@@ -25,7 +25,10 @@ class ConventionalSimplifiedModel(GeothermalSimplifiedModel):
         self.par_subs_dict = self.get_par_dict(parameters)
         self.complete_par_dict(parameters)
         self.ch4 = ch4
-        self.simplified_model_dict = self.get_simplified_model(self.ch4)
+        # Characterization factor of methane, part of the cache key since it is a coefficient of simplified models
+        self.ch4_cf = self.get_ch4_cf() if ch4 else 0
+        self.simplified_model_dict = self.get_cached_simplified_model(cache_dir)
+        self.compiled_model = self.compile_simplified_model(self.simplified_model_dict)
 
     @staticmethod
     def get_ch4_cf():
@@ -63,14 +66,18 @@ class ConventionalSimplifiedModel(GeothermalSimplifiedModel):
             )
         )
 
-    def get_simplified_model(self, ch4=True):
+    def get_simplified_model(self, ch4=None, methods_groups=None):
         """
         Compute constants (alpha, beta) and an expression for the simplified model
         :return:
         """
+        if ch4 is None:
+            ch4 = self.ch4
+        if methods_groups is None:
+            methods_groups = self.methods_groups
         simplified_model_dict = dict()
 
-        for group in self.methods_groups:
+        for group in methods_groups:
             inf_params = group["parameters"]
             par_dict_copy = deepcopy(self.par_subs_dict)
             [par_dict_copy.pop(self.correspondence_dict[p]) for p in inf_params]
@@ -103,10 +110,7 @@ class ConventionalSimplifiedModel(GeothermalSimplifiedModel):
                     # }
                     simplified_model_dict[method] = {
                         "s_const": {1: alpha1_val, 2: alpha2_val, 3: alpha3_val},
-                        "s_model": lambda alpha, parameters:
-                        alpha[1] * parameters["co2_emissions"]
-                        + alpha[2] * parameters.get("ch4_emissions", 0)
-                        + alpha[3],
+                        "s_form": "alpha",
                     }
 
             # Betas, 20/15%
@@ -125,12 +129,7 @@ class ConventionalSimplifiedModel(GeothermalSimplifiedModel):
                     beta4 = temp[1]
                     simplified_model_dict[method] = {
                         "s_const": {1: beta1, 2: beta2, 3: beta3, 4: beta4},
-                        "s_model": lambda beta, parameters: (
-                            parameters["average_depth_of_wells"] * beta[1] + beta[2]
-                        )
-                        / parameters["gross_power_per_well"]
-                        + parameters["average_depth_of_wells"] * beta[3]
-                        + beta[4],
+                        "s_form": "beta_2",
                     }
 
             # Betas, 10%
@@ -164,17 +163,7 @@ class ConventionalSimplifiedModel(GeothermalSimplifiedModel):
                             5: beta5,
                             6: beta6,
                         },
-                        "s_model": lambda beta, parameters: (
-                            parameters["initial_harmonic_decline_rate"]
-                            * parameters["average_depth_of_wells"]
-                            * beta[1]
-                            + parameters["initial_harmonic_decline_rate"] * beta[2]
-                            + parameters["average_depth_of_wells"] * beta[3]
-                            + beta[4]
-                        )
-                        / parameters["gross_power_per_well"]
-                        + parameters["average_depth_of_wells"] * beta[5]
-                        + beta[6],
+                        "s_form": "beta_3",
                     }
 
             # Betas, 5%
@@ -211,25 +200,13 @@ class ConventionalSimplifiedModel(GeothermalSimplifiedModel):
                             5: beta5,
                             6: beta6,
                         },
-                        "s_model": lambda beta, parameters: parameters[
-                            "initial_harmonic_decline_rate"
-                        ]
-                        * (parameters["average_depth_of_wells"] * beta[1] + beta[2])
-                        / parameters["gross_power_per_well"]
-                        + (
-                            parameters["average_depth_of_wells"] * beta[3]
-                            + parameters["success_rate_primary_wells"] * beta[4]
-                        )
-                        / parameters["gross_power_per_well"]
-                        / parameters["success_rate_primary_wells"]
-                        + parameters["average_depth_of_wells"] * beta[5]
-                        + beta[6],
+                        "s_form": "beta_4",
                     }
 
         return simplified_model_dict
 
     def run(self, parameters, lcia_methods=None):
-        return super().run(parameters, self.simplified_model_dict, lcia_methods)
+        return super().run(parameters, self.compiled_model, lcia_methods)
 
     def get_coeff(self, lcia_methods=None):
         return super().get_coeff(self.simplified_model_dict, lcia_methods)
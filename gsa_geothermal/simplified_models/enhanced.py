@@ -8,7 +8,7 @@ from .base import GeothermalSimplifiedModel
 
 class EnhancedSimplifiedModel(GeothermalSimplifiedModel):
     """Enhanced simplified model CHILD class."""
-    def __init__(self, setup_geothermal_gsa, path, threshold, exploration=True):
+    def __init__(self, setup_geothermal_gsa, path, threshold, exploration=True, cache_dir=None):
         super(EnhancedSimplifiedModel, self).__init__(
             setup_geothermal_gsa=setup_geothermal_gsa,
             path=path,
@@ -22,7 +22,8 @@ class EnhancedSimplifiedModel(GeothermalSimplifiedModel):
         parameters.static()  # TODO Remember to fix this
         self.par_subs_dict = self.get_par_dict(parameters)
         self.complete_par_dict(parameters)
-        self.simplified_model_dict = self.get_simplified_model()
+        self.simplified_model_dict = self.get_cached_simplified_model(cache_dir)
+        self.compiled_model = self.compile_simplified_model(self.simplified_model_dict)
 
     def complete_par_dict(self, parameters):
         self.par_subs_dict.update(
@@ -42,14 +43,16 @@ class EnhancedSimplifiedModel(GeothermalSimplifiedModel):
             )
         )
 
-    def get_simplified_model(self):
+    def get_simplified_model(self, methods_groups=None):
         """
         Compute constants (chi, gamma) and an expression for the simplified model
         :return:
         """
+        if methods_groups is None:
+            methods_groups = self.methods_groups
         simplified_model_dict = dict()
 
-        for group in self.methods_groups:
+        for group in methods_groups:
             inf_params = group["parameters"]
             par_dict_copy = deepcopy(self.par_subs_dict)
             [par_dict_copy.pop(self.correspondence_dict[p]) for p in inf_params]
@@ -67,8 +70,7 @@ class EnhancedSimplifiedModel(GeothermalSimplifiedModel):
                     chi2 = collect(impact_copy, 1 / P_ne, evaluate=False)[1]
                     simplified_model_dict[method] = {
                         "s_const": {1: chi1, 2: chi2},
-                        "s_model": lambda chi, parameters:
-                            chi[1] / parameters["installed_capacity"] + chi[2],
+                        "s_form": "chi_1",
                     }
 
             # chis, 5%
@@ -94,18 +96,7 @@ class EnhancedSimplifiedModel(GeothermalSimplifiedModel):
 
                     simplified_model_dict[method] = {
                         "s_const": {1: chi1, 2: chi2, 3: chi3, 4: chi4},
-                        "s_model": lambda chi, parameters: (
-                               parameters["success_rate_primary_wells"]
-                               * parameters["average_depth_of_wells"]
-                               * chi[1]
-                               + parameters["success_rate_primary_wells"] * chi[2]
-                               + parameters["average_depth_of_wells"] * chi[3]
-                        )
-                        / (
-                               parameters["success_rate_primary_wells"]
-                               * parameters["installed_capacity"]
-                        )
-                        + chi[4],
+                        "s_form": "chi_3",
                     }
 
             # deltas 15/10%
@@ -124,12 +115,7 @@ class EnhancedSimplifiedModel(GeothermalSimplifiedModel):
 
                     simplified_model_dict[method] = {
                         "s_const": {1: delta1, 2: delta2, 3: delta3},
-                        "s_model": lambda delta, parameters: (
-                             parameters["specific_diesel_consumption"] * delta[1]
-                             + delta[2]
-                        )
-                        / parameters["installed_capacity"]
-                        + delta[3],
+                        "s_form": "delta_2",
                     }
 
             # deltas 5%
@@ -183,31 +169,13 @@ class EnhancedSimplifiedModel(GeothermalSimplifiedModel):
                             5: delta5,
                             6: delta6,
                         },
-                        "s_model": lambda delta, parameters: (
-                             parameters["specific_diesel_consumption"]
-                             * parameters["success_rate_primary_wells"]
-                             * parameters["average_depth_of_wells"]
-                             * delta[1]
-                             + parameters["specific_diesel_consumption"]
-                             * parameters["average_depth_of_wells"]
-                             * delta[2]
-                             + parameters["success_rate_primary_wells"]
-                             * parameters["average_depth_of_wells"]
-                             * delta[3]
-                             + parameters["success_rate_primary_wells"] * delta[4]
-                             + parameters["average_depth_of_wells"] * delta[5]
-                        )
-                        / (
-                             parameters["success_rate_primary_wells"]
-                             * parameters["installed_capacity"]
-                        )
-                        + delta[6],
+                        "s_form": "delta_4",
                     }
 
         return simplified_model_dict
 
     def run(self, parameters, lcia_methods=None):
-        return super().run(parameters, self.simplified_model_dict, lcia_methods)
+        return super().run(parameters, self.compiled_model, lcia_methods)
 
     def get_coeff(self, lcia_methods=None):
         return super().get_coeff(self.simplified_model_dict, lcia_methods)
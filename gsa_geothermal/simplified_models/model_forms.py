@@ -0,0 +1,153 @@
+"""
+Registry of the forms of simplified models. Each form is a numpy function of a coefficient matrix c with shape
+(n_coefficients, n_methods) and of the influential parameters, so that all methods that share a form are evaluated
+at once. Rows of c follow the keys 1, 2, ... of s_const, and parameters have a trailing axis for methods.
+"""
+
+
+# Conventional, alphas all thresholds
+def alpha(c, co2_emissions, ch4_emissions):
+    return c[0] * co2_emissions + c[1] * ch4_emissions + c[2]
+
+
+# Conventional, betas 20/15%
+def beta_2(c, gross_power_per_well, average_depth_of_wells):
+    return (
+        (average_depth_of_wells * c[0] + c[1]) / gross_power_per_well
+        + average_depth_of_wells * c[2]
+        + c[3]
+    )
+
+
+# Conventional, betas 10%
+def beta_3(c, gross_power_per_well, average_depth_of_wells, initial_harmonic_decline_rate):
+    return (
+        (
+            initial_harmonic_decline_rate * average_depth_of_wells * c[0]
+            + initial_harmonic_decline_rate * c[1]
+            + average_depth_of_wells * c[2]
+            + c[3]
+        )
+        / gross_power_per_well
+        + average_depth_of_wells * c[4]
+        + c[5]
+    )
+
+
+# Conventional, betas 5%
+def beta_4(
+    c,
+    gross_power_per_well,
+    average_depth_of_wells,
+    initial_harmonic_decline_rate,
+    success_rate_primary_wells,
+):
+    return (
+        initial_harmonic_decline_rate
+        * (average_depth_of_wells * c[0] + c[1])
+        / gross_power_per_well
+        + (average_depth_of_wells * c[2] + success_rate_primary_wells * c[3])
+        / gross_power_per_well
+        / success_rate_primary_wells
+        + average_depth_of_wells * c[4]
+        + c[5]
+    )
+
+
+# Enhanced, chis 20/15/10%
+def chi_1(c, installed_capacity):
+    return c[0] / installed_capacity + c[1]
+
+
+# Enhanced, chis 5%
+def chi_3(c, installed_capacity, success_rate_primary_wells, average_depth_of_wells):
+    return (
+        success_rate_primary_wells * average_depth_of_wells * c[0]
+        + success_rate_primary_wells * c[1]
+        + average_depth_of_wells * c[2]
+    ) / (success_rate_primary_wells * installed_capacity) + c[3]
+
+
+# Enhanced, deltas 15/10%
+def delta_2(c, installed_capacity, specific_diesel_consumption):
+    return (specific_diesel_consumption * c[0] + c[1]) / installed_capacity + c[2]
+
+
+# Enhanced, deltas 5%
+def delta_4(
+    c,
+    installed_capacity,
+    success_rate_primary_wells,
+    average_depth_of_wells,
+    specific_diesel_consumption,
+):
+    return (
+        specific_diesel_consumption * success_rate_primary_wells * average_depth_of_wells * c[0]
+        + specific_diesel_consumption * average_depth_of_wells * c[1]
+        + success_rate_primary_wells * average_depth_of_wells * c[2]
+        + success_rate_primary_wells * c[3]
+        + average_depth_of_wells * c[4]
+    ) / (success_rate_primary_wells * installed_capacity) + c[5]
+
+
+# Name of each form, its function, its parameters in the order of arguments, and default values of parameters
+MODEL_FORMS = {
+    "alpha": dict(
+        function=alpha,
+        parameters=["co2_emissions", "ch4_emissions"],
+        defaults={"ch4_emissions": 0},
+    ),
+    "beta_2": dict(
+        function=beta_2,
+        parameters=["gross_power_per_well", "average_depth_of_wells"],
+        defaults={},
+    ),
+    "beta_3": dict(
+        function=beta_3,
+        parameters=[
+            "gross_power_per_well",
+            "average_depth_of_wells",
+            "initial_harmonic_decline_rate",
+        ],
+        defaults={},
+    ),
+    "beta_4": dict(
+        function=beta_4,
+        parameters=[
+            "gross_power_per_well",
+            "average_depth_of_wells",
+            "initial_harmonic_decline_rate",
+            "success_rate_primary_wells",
+        ],
+        defaults={},
+    ),
+    "chi_1": dict(
+        function=chi_1,
+        parameters=["installed_capacity"],
+        defaults={},
+    ),
+    "chi_3": dict(
+        function=chi_3,
+        parameters=[
+            "installed_capacity",
+            "success_rate_primary_wells",
+            "average_depth_of_wells",
+        ],
+        defaults={},
+    ),
+    "delta_2": dict(
+        function=delta_2,
+        parameters=["installed_capacity", "specific_diesel_consumption"],
+        defaults={},
+    ),
+    "delta_4": dict(
+        function=delta_4,
+        parameters=[
+            "installed_capacity",
+            "success_rate_primary_wells",
+            "average_depth_of_wells",
+            "specific_diesel_consumption",
+        ],
+        defaults={},
+    ),
+}
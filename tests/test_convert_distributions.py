@@ -0,0 +1,18 @@
+import numpy as np
+import stats_arrays as sa
+
+from gsa_geothermal.global_sensitivity_analysis.convert_distributions import SampleConverter
+
+
+def test_convert_without_params():
+    converter = SampleConverter(np.zeros(0, dtype=sa.UncertaintyBase.from_dicts().dtype))
+    converted = converter.convert(np.zeros((5, 0)))
+    assert converted.shape == (5, 0)
+
+
+def test_convert_uniform():
+    params = sa.UncertaintyBase.from_dicts(
+        {"uncertainty_type": sa.UniformUncertainty.id, "minimum": 1, "maximum": 3},
+    )
+    converted = SampleConverter(params).convert(np.array([[0.0], [0.5], [1.0]]))
+    assert np.allclose(converted[:, 0], [1, 2, 3])
@@ -0,0 +1,36 @@
+import numpy as np
+from scipy import stats
+
+from gsa_geothermal.global_sensitivity_analysis import given_data_analyze
+from gsa_geothermal.global_sensitivity_analysis.given_data import pawn_given_data, quantile_bins
+
+
+def linear_model(n_runs, seed=0):
+    # Y = 2 X1 + X2 with uniform inputs has first order indices 0.8 and 0.2, X3 is not influential, X4 is fixed
+    rng = np.random.default_rng(seed)
+    X = np.column_stack([rng.uniform(size=(n_runs, 3)), np.full(n_runs, 0.5)])
+    Y = 2 * X[:, 0] + X[:, 1]
+    return X, Y
+
+
+def test_first_order_analytic():
+    X, Y = linear_model(20000)
+    dict_ = given_data_analyze(
+        dict(x1=X[:, 0], x2=X[:, 1], x3=X[:, 2], x4=0.5), dict(score=Y, score_shifted=Y + 100)
+    )
+    assert dict_["parameters"] == ["x1", "x2", "x3", "x4"]
+    assert dict_["methods"] == ["score", "score_shifted"]
+    for S1 in dict_["S1"]:
+        assert np.allclose(S1, [0.8, 0.2, 0, 0], atol=0.02)
+    assert dict_["S1"][0, 3] == 0 and dict_["PAWN"][0, 3] == 0
+    assert dict_["PAWN"][0, 0] > dict_["PAWN"][0, 1] > 5 * dict_["PAWN"][0, 2]
+
+
+def test_pawn_equal_ks_2samp():
+    X, Y = linear_model(500)
+    n_bins = 7
+    pawn = pawn_given_data(X, Y[:, np.newaxis], n_bins, statistic="max")
+    bins = quantile_bins(X, n_bins)
+    for i in range(3):
+        ks = [stats.ks_2samp(Y[bins[:, i] == b], Y).statistic for b in range(n_bins)]
+        assert np.isclose(pawn[0, i], np.max(ks))
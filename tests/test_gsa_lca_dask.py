@@ -0,0 +1,22 @@
+import numpy as np
+from scipy import sparse
+
+from gsa_geothermal.global_sensitivity_analysis import GSAinLCA
+
+PARAMS_DTYPE = [("row", np.uint32), ("col", np.uint32), ("amount", np.float32)]
+
+
+def test_fill_matrix_sums_duplicates():
+    # Element (1, 2) appears twice and (0, 0) three times, as repeated exchanges in tech_params
+    params = np.array(
+        [(1, 2, 0.5), (0, 0, 1.0), (2, 1, -3.0), (1, 2, 0.25), (0, 0, 2.0), (2, 2, 1.0), (0, 0, 4.0)],
+        dtype=PARAMS_DTYPE,
+    )
+    row_dict = col_dict = {key: key for key in range(3)}
+    matrix, slots = GSAinLCA.build_matrix_pattern(params, row_dict, col_dict, "row", "col")
+    assert matrix.nnz == 4
+
+    for vector in [params["amount"].astype(np.float64), np.arange(1.0, 8.0)]:
+        expected = sparse.coo_matrix((vector, (params["row"], params["col"])), shape=(3, 3)).toarray()
+        filled = GSAinLCA.fill_matrix(matrix, slots, vector)
+        assert np.array_equal(filled.toarray(), expected)
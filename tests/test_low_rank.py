@@ -0,0 +1,37 @@
+import numpy as np
+from scipy import sparse
+from scipy.sparse.linalg import spsolve
+
+from gsa_geothermal.global_sensitivity_analysis.low_rank import ForegroundUpdate
+from gsa_geothermal.global_sensitivity_analysis.pardiso_solver import PatternSolver
+
+
+def test_foreground_update_equal_full_solve():
+    rng = np.random.default_rng(0)
+    n, n_bio, n_methods = 30, 8, 3
+    A = (sparse.random(n, n, density=0.1, random_state=1) * -0.1 + sparse.eye(n)).tocsr()
+    B = sparse.random(n_bio, n, density=0.3, random_state=2).tocsr()
+    C = rng.uniform(size=(n_methods, n_bio))
+    demand_array = np.zeros(n)
+    demand_array[0] = 1
+
+    # Foreground columns 0 and 3, with elements that are in A, and one that is not
+    tech_rows, tech_cols = np.array([0, 5, 7, 3, 12]), np.array([0, 0, 3, 3, 3])
+    tech_base = np.asarray(A[tech_rows, tech_cols]).reshape(-1)
+    bio_rows, bio_cols = np.array([1, 4, 4]), np.array([0, 2, 9])
+    bio_base = np.asarray(B[bio_rows, bio_cols]).reshape(-1)
+
+    foreground_update = ForegroundUpdate(
+        A, B, demand_array, tech_rows, tech_cols, tech_base, bio_rows, bio_cols, bio_base, PatternSolver(A)
+    )
+    n_samples = 4
+    tech_values = tech_base + rng.uniform(-0.2, 0.2, size=(n_samples, tech_rows.shape[0]))
+    bio_values = bio_base + rng.uniform(0, 1, size=(n_samples, bio_rows.shape[0]))
+    scores = foreground_update.scores(tech_values, bio_values, C)
+
+    for i in range(n_samples):
+        A_i, B_i = A.tolil(), B.tolil()
+        A_i[tech_rows, tech_cols] = tech_values[i]
+        B_i[bio_rows, bio_cols] = bio_values[i]
+        expected = C @ (B_i.tocsr() @ spsolve(A_i.tocsc(), demand_array))
+        assert np.allclose(scores[i], expected)
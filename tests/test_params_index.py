@@ -0,0 +1,22 @@
+import numpy as np
+import pytest
+
+from gsa_geothermal.global_sensitivity_analysis.params_index import ParamsIndex
+
+PARAMS = np.array(
+    [(2, 0), (0, 1), (1, 1), (0, 1), (3, 2), (1, 0)],
+    dtype=[("row", np.uint32), ("col", np.uint32)],
+)
+
+
+def test_find_first_occurrence():
+    index = ParamsIndex(PARAMS)
+    assert index.find([1, 0, 3, 2], [0, 1, 2, 0]).tolist() == [5, 1, 4, 0]
+
+
+def test_find_missing_pairs():
+    index = ParamsIndex(PARAMS)
+    # Missing row, column beyond the last one, and row larger than any key
+    for rows, cols in [([1, 2], [1, 1]), ([0], [3]), ([9], [2])]:
+        with pytest.raises(KeyError):
+            index.find(rows, cols)
@@ -0,0 +1,29 @@
+import numpy as np
+from SALib.sample import saltelli
+
+from gsa_geothermal.global_sensitivity_analysis import SaltelliRows
+
+PROBLEM = {
+    "num_vars": 4,
+    "names": ["x1", "x2", "x3", "x4"],
+    "bounds": [[0, 1], [0, 1], [-1, 2], [0, 10]],
+}
+
+
+def test_rows_equal_salib():
+    for calc_second_order in [False, True]:
+        X = saltelli.sample(PROBLEM, 32, calc_second_order=calc_second_order)
+        saltelli_rows = SaltelliRows(PROBLEM, 32, calc_second_order=calc_second_order)
+        assert saltelli_rows.n_rows == X.shape[0]
+        assert np.array_equal(saltelli_rows.rows(0, saltelli_rows.n_rows), X)
+        assert np.array_equal(saltelli_rows.rows(13, 101), X[13:101])
+
+
+def test_chunks_cover_design():
+    X = saltelli.sample(PROBLEM, 32, calc_second_order=False)
+    saltelli_rows = SaltelliRows(PROBLEM, 32, calc_second_order=False)
+    for align_blocks in [False, True]:
+        chunks = [saltelli_rows.chunk(5, i, align_blocks=align_blocks) for i in range(5)]
+        assert np.array_equal(np.vstack([X_chunk for _, _, X_chunk in chunks]), X)
+        if align_blocks:
+            assert all(start % saltelli_rows.block_size == 0 for start, _, _ in chunks)
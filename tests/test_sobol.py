@@ -0,0 +1,60 @@
+import numpy as np
+from SALib.analyze import sobol
+from SALib.sample import saltelli
+
+from gsa_geothermal.global_sensitivity_analysis import SaltelliRows, SobolAccumulator, my_sobol_analyze
+
+PROBLEM = {
+    "num_vars": 3,
+    "names": ["x1", "x2", "x3"],
+    "bounds": [[-np.pi, np.pi]] * 3,
+}
+
+
+def ishigami(X):
+    return np.sin(X[:, 0]) + 7 * np.sin(X[:, 1]) ** 2 + 0.1 * X[:, 2] ** 4 * np.sin(X[:, 0])
+
+
+def test_second_order_shifted_scores():
+    X = saltelli.sample(PROBLEM, 512, calc_second_order=True)
+    # Scores far from zero, as LCA scores, SALib standardizes them before its second order estimator
+    Y = ishigami(X) + 100
+    dict_ = my_sobol_analyze(PROBLEM, Y, calc_second_order=True)
+    dict_salib = sobol.analyze(PROBLEM, Y, calc_second_order=True, print_to_console=False)
+    upper = np.triu_indices(3, k=1)
+    assert np.allclose(dict_["S2"][upper], dict_salib["S2"][upper])
+    dict_unshifted = my_sobol_analyze(PROBLEM, Y - 100, calc_second_order=True)
+    assert np.allclose(dict_["S2"][upper], dict_unshifted["S2"][upper])
+
+
+def test_accumulator_equal_sobol_analyze():
+    for calc_second_order in [False, True]:
+        X = saltelli.sample(PROBLEM, 64, calc_second_order=calc_second_order)
+        Y = np.column_stack([ishigami(X), ishigami(X[:, ::-1]) + 10])
+        dict_ = my_sobol_analyze(PROBLEM, Y, calc_second_order=calc_second_order)
+
+        step = 2 * PROBLEM["num_vars"] + 2 if calc_second_order else PROBLEM["num_vars"] + 2
+        first = SobolAccumulator(PROBLEM["num_vars"], 2, calc_second_order=calc_second_order)
+        first.update(Y[: 10 * step]).update(Y[10 * step: 25 * step])
+        second = SobolAccumulator(PROBLEM["num_vars"], 2, calc_second_order=calc_second_order)
+        second.update(Y[25 * step:])
+        merged = first.merge(second).indices()
+
+        assert np.allclose(merged["S1"], dict_["S1"])
+        assert np.allclose(merged["ST"], dict_["ST"])
+
+
+def test_combine_aligned_chunks_equal_sobol_analyze():
+    saltelli_rows = SaltelliRows(PROBLEM, 64, calc_second_order=False)
+    X = saltelli_rows.rows(0, saltelli_rows.n_rows)
+    dict_ = my_sobol_analyze(PROBLEM, ishigami(X), calc_second_order=False)
+
+    # Each worker only returns partial sums of its chunk of complete blocks
+    accumulators = []
+    for i_chunk in range(5):
+        _, _, X_chunk = saltelli_rows.chunk(5, i_chunk, align_blocks=True)
+        accumulators.append(SobolAccumulator(PROBLEM["num_vars"]).update(ishigami(X_chunk)))
+    combined = SobolAccumulator.combine(accumulators).indices()
+
+    assert np.allclose(combined["S1"][0], dict_["S1"])
+    assert np.allclose(combined["ST"][0], dict_["ST"])